@@ -6,7 +6,7 @@ like those found in JSON, and extract values from these structures using
 the defined paths.
 """
 
-from typing import Any, Iterator, TypeVar, overload
+from typing import Any, Callable, Iterator, TypeVar, overload
 
 T = TypeVar("T")
 V = TypeVar("V")
@@ -163,6 +163,10 @@ class Structpath:
         yields tuples of (variable_values, value) for all possible combinations
         of variable values that lead to valid paths in the data.
 
+        Matches come in the order of the data: dict entries in insertion
+        order and list items by index. Key variables are bound to strings,
+        with integer keys in their decimal form.
+
         Args:
             data: The data structure to navigate
 
@@ -179,6 +183,28 @@ class Structpath:
         """
         pass
 
+    def iter_values(self, data: Any) -> Iterator[Any]:
+        """
+        Iterate over the values of all variable resolutions in the data.
+
+        Like `iter`, but yields only the values, without building a dict of
+        variable values for each match. Values come in the same order as
+        from `iter`.
+
+        Args:
+            data: The data structure to navigate
+
+        Returns:
+            An iterator yielding the matched values
+
+        Examples:
+            >>> data = {"users": {"user1": {"name": "Alice"}, "user2": {"name": "Bob"}}}
+            >>> path = Structpath.parse("$users.#userId.name")
+            >>> list(path.iter_values(data))
+            ['Alice', 'Bob']
+        """
+        pass
+
     @overload
     def write(
         self,
@@ -238,6 +264,13 @@ class Structpath:
         This method returns an iterator that yields tuples of (Structpath, value)
         for every path in the data structure.
 
+        The walk keeps its own stack rather than recursing, so it handles
+        data nested to any depth that fits in memory, regardless of the
+        recursion limit.
+
+        Dict entries are visited in insertion order and list items by index;
+        keys are not sorted.
+
         Args:
             data: The data structure to walk through
 
@@ -259,6 +292,105 @@ class Structpath:
         """
         pass
 
+    @staticmethod
+    def walk_where(
+        data: T,
+        key_pred: Callable[[Any], bool] | None = None,
+        max_depth: int | None = None,
+    ) -> Iterator[tuple["Structpath", Any]]:
+        """
+        Walk through the parts of a data structure selected while walking.
+
+        Works like `walk`, but decides which children to visit on the way,
+        so that the parts left out are never visited at all, rather than
+        filtered out afterwards.
+
+        Args:
+            data: The data structure to walk through
+            key_pred: Called with the key or index of every child before
+                visiting it; children for which it returns false are
+                skipped, along with everything inside them
+            max_depth: How deep to go, the root being at depth 0; values at
+                this depth are yielded, but not descended into
+
+        Returns:
+            An iterator yielding (path, value) tuples
+
+        Examples:
+            >>> data = {"users": [{"name": "Ann", "stats": {"logins": 3}}]}
+            >>> wanted = lambda key: key in ("users", "name") or isinstance(key, int)
+            >>> for path, value in Structpath.walk_where(data, wanted):
+            ...     print(f"{path}: {value}")
+            $users[0].name: Ann
+            $users[0]: {'name': 'Ann', 'stats': {'logins': 3}}
+            $users: [{'name': 'Ann', 'stats': {'logins': 3}}]
+            $: {'users': [{'name': 'Ann', 'stats': {'logins': 3}}]}
+            >>> [str(path) for path, _ in Structpath.walk_where(data, max_depth=1)]
+            ['$users', '$']
+        """
+        pass
+
+    @staticmethod
+    def walk_segments(data: T) -> Iterator[tuple[tuple[Any, ...], Any]]:
+        """
+        Walk through all values in a data structure, without building paths.
+
+        Visits the same values in the same order as `walk`, but yields the
+        keys and indexes leading to each value as a tuple, exactly as they
+        appear in the data, instead of a Structpath. Nothing is formatted,
+        so this is the faster choice when the segments are all that is
+        needed.
+
+        Args:
+            data: The data structure to walk through
+
+        Returns:
+            An iterator yielding (segments, value) tuples
+
+        Examples:
+            >>> data = {"a": [1, {"b": 2}]}
+            >>> for segments, value in Structpath.walk_segments(data):
+            ...     print(segments, value)
+            ('a', 0) 1
+            ('a', 1, 'b') 2
+            ('a', 1) {'b': 2}
+            ('a',) [1, {'b': 2}]
+            () {'a': [1, {'b': 2}]}
+        """
+        pass
+
+    @staticmethod
+    def walk_batch(
+        data: T, leaves_only: bool = False
+    ) -> tuple[list[str], list[Any]]:
+        """
+        Walk through all paths in a data structure at once.
+
+        Visits the same values in the same order as `walk`, but returns
+        them as two parallel lists, with the paths as strings. No path
+        object or tuple is created per value, which makes this the faster
+        choice when the whole structure is needed anyway.
+
+        Args:
+            data: The data structure to walk through
+            leaves_only: Leave out dicts and lists, keeping only the scalar
+                values inside them, such as the numbers to load into an
+                array
+
+        Returns:
+            A tuple of the list of path strings and the list of values
+
+        Examples:
+            >>> paths, values = Structpath.walk_batch({"a": [1, 2]})
+            >>> paths
+            ['$a[0]', '$a[1]', '$a', '$']
+            >>> values
+            [1, 2, [1, 2], {'a': [1, 2]}]
+            >>> Structpath.walk_batch({"a": [1, 2]}, leaves_only=True)
+            (['$a[0]', '$a[1]'], [1, 2])
+        """
+        pass
+
     def __str__(self) -> str:
         """
         Return a string representation of the path.
@@ -72,3 +72,18 @@ class TestStructpathBuild(StructpathTestCase):
 
         value = path.get(data, {"id": "user1"})
         self.assertEqual(value, 85)
+
+    def test_extend_path_after_get(self):
+        path = Structpath()
+        path.push_key("user")
+        self.assert_equal(path.get(self.test_data)["age"], 30)
+
+        path.push_key("age")
+        self.assert_equal(path.get(self.test_data), 30)
+
+    def test_no_instance_dict(self):
+        path = Structpath.parse("$user.name")
+
+        self.assertFalse(hasattr(path, "__dict__"))
+        with self.assertRaises(AttributeError):
+            path.extra = 1
@@ -1,53 +1,104 @@
+import functools
+import hashlib
+import marshal
 import re
 import sys
+import textwrap
 import traceback
 from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
 
+from structpath import Structpath
+
+
+OPENING_FENCE = re.compile(r"([ \t]*`{3,})[ \t]*([\w+-]+)?[ \t]*")
+
 
 def code_blocks(path: Path) -> Iterator[tuple[int, int, str]]:
-    pattern = re.compile(
-        r"""
-        (?:\n+|\A\n?|(?<=\n))
-        (^[ \t]*`{3,})\s{0,99}?([\w+-]+)?\s{0,99}?\n
-        (.*?)                             # $3 = code block content
-        \1[ \t]*\n                      # closing fence
-        """,
-        re.M | re.X | re.S,
-    )
     with open(path, "r") as f:
-        file = f.read()
+        lines = f.read().split("\n")
+
+    fence = None
+    for number, line in enumerate(lines):
+        if fence is None:
+            match = OPENING_FENCE.fullmatch(line)
+            if match:
+                fence, language = match[1], match[2]
+                start, content = number + 1, []
+        elif line.rstrip(" \t") == fence:
+            if language and language.lower() == "python":
+                block = "".join(f"{text}\n" for text in content)
+                yield start, start + len(content), block
+            fence = None
+        else:
+            content.append(line)
+
+
+@functools.lru_cache
+def cached_code_blocks(path: Path, mtime: float) -> list[tuple[int, int, str]]:
+    return list(code_blocks(path))
+
+
+def pytest_generate_tests(metafunc):
+    if "block" not in metafunc.fixturenames:
+        return
+
+    blocks = [
+        (path, block, start, end)
+        for path in sorted(Path("docs").glob("**/*.md"))
+        for start, end, block in cached_code_blocks(
+            path, path.stat().st_mtime
+        )
+    ]
+    metafunc.parametrize("path, block, start, end", blocks)
 
-    for match in pattern.finditer(file):
-        if not match[2]:
-            continue
-        if match[2].lower() == "python":
-            block = match[3]
-            block_index = file.index(block)
-            start = file[:block_index].count("\n")
-            end = start + block.count("\n")
-            yield start, end, block
 
+@pytest.fixture(scope="session")
+def namespaces():
+    return {}
+
+
+@pytest.fixture(scope="session")
+def compiled_dir(pytestconfig) -> Path | None:
+    # the cache plugin may be disabled, e.g. with -p no:cacheprovider
+    cache = getattr(pytestconfig, "cache", None)
+    return cache.mkdir("docs_compiled") if cache is not None else None
+
+
+def compile_block(block: str, path: Path, compiled_dir: Path | None):
+    if compiled_dir is None:
+        return compile(block, str(path), "exec")
+
+    # code objects are only valid for the interpreter that marshalled them
+    digest = hashlib.blake2b(
+        f"{sys.implementation.cache_tag}\0{path}\0{block}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    cached = compiled_dir / f"{digest}.marshal"
+
+    try:
+        with open(cached, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    code = compile(block, str(path), "exec")
+    with open(cached, "wb") as f:
+        marshal.dump(code, f)
+    return code
 
-blocks = [
-    (path, block, start, end)
-    for path in Path("docs").glob("**/*.md")
-    for start, end, block in code_blocks(path)
-]
 
+def test_block(path, block, start, end, namespaces, compiled_dir):
+    # blocks of one document build on each other, documents are isolated
+    namespace = namespaces.setdefault(path, {"Structpath": Structpath})
 
-@pytest.mark.parametrize("path, block,start, end", blocks)
-def test_block(path, block, start, end):
     # remove blockwise leading spaces
-    lines = block.split("\n")
-    while all(line.startswith(" ") or not line for line in lines):
-        lines = [line[1:] for line in lines]
-    block = "\n".join(lines)
+    block = textwrap.dedent(block)
 
     try:
-        exec(block, globals())
+        exec(compile_block(block, path, compiled_dir), namespace)
     except Exception as error:
         _, _, tb = sys.exc_info()
         line_in_block = traceback.extract_tb(tb)[-1][1]
@@ -1,4 +1,5 @@
 from base import StructpathTestCase
+from base import _CustomClass
 
 from structpath import Structpath
 
@@ -64,3 +65,21 @@ class TestStructpathGet(StructpathTestCase):
         # Using get with a path containing variables should error
         with self.assertRaises(ValueError):
             path.get(data)
+
+    def test_get_returns_stored_object(self):
+        items = [1, 2, 3]
+        custom = _CustomClass(42)
+        data = {"a": {"items": items, "custom": custom}}
+
+        self.assertIs(Structpath.parse("$a.items").get(data), items)
+        self.assertIs(Structpath.parse("$a.custom").get(data), custom)
+
+    def test_get_int_dict_keys(self):
+        data = {7: {"name": "seven"}}
+
+        path = Structpath.parse("$7.name")
+        self.assert_equal(path.get(data), "seven")
+
+    def test_get_ignores_vars_without_variables(self):
+        path = Structpath.parse("$user.addresses[1].city")
+        self.assert_equal(path.get(self.test_data, {"unused": 1}), "Somewhere")
@@ -1,3 +1,7 @@
+import gc
+import operator
+import weakref
+
 from base import StructpathTestCase
 
 from structpath import Structpath
@@ -79,3 +83,78 @@ class TestStructpathIter(StructpathTestCase):
         path = Structpath.parse("$a.#key.c")
         with self.assertRaises(ValueError):
             path.get(data)
+
+    def test_iter_in_document_order(self):
+        data = {"teams": [{"b": 1, "a": 2}, {"c": 3}]}
+        path = Structpath.parse("$teams[#idx].#name")
+
+        results = list(path.iter(data))
+        self.assertEqual(
+            results,
+            [
+                ({"idx": 0, "name": "b"}, 1),
+                ({"idx": 0, "name": "a"}, 2),
+                ({"idx": 1, "name": "c"}, 3),
+            ],
+        )
+
+    def test_iter_binds_int_keys_as_strings(self):
+        data = {"flags": {True: "on", 2: "two", "x": "ex"}}
+        path = Structpath.parse("$flags.#key")
+
+        results = list(path.iter(data))
+        self.assertEqual(
+            results,
+            [({"key": "1"}, "on"), ({"key": "2"}, "two"), ({"key": "x"}, "ex")],
+        )
+        for vars_dict, value in results:
+            self.assertEqual(path.get(data, vars_dict), value)
+
+    def test_iter_rejects_other_keys(self):
+        path = Structpath.parse("$#key")
+
+        with self.assertRaises(TypeError):
+            list(path.iter({1.5: "x"}))
+
+    def test_iter_skips_missing_branches(self):
+        data = {"users": {"a": {"score": 1}, "b": {}, "c": [1]}}
+        path = Structpath.parse("$users.#userId.score")
+
+        results = list(path.iter(data))
+        self.assertEqual(results, [({"userId": "a"}, 1)])
+
+    def test_iter_values(self):
+        data = {"teams": [{"b": 1, "a": 2}, {"c": 3}, 4]}
+        path = Structpath.parse("$teams[#idx].#name")
+
+        self.assertEqual(list(path.iter_values(data)), [1, 2, 3])
+        self.assertEqual(
+            list(path.iter_values(data)),
+            [value for _, value in path.iter(data)],
+        )
+
+    def test_iter_cycle_is_collected(self):
+        class Leaf:
+            pass
+
+        leaf = Leaf()
+        leaf_ref = weakref.ref(leaf)
+        box = [leaf]
+        path = Structpath.parse("$#name")
+
+        box.append(path.iter({"a": box}))
+        del leaf, box
+        gc.collect()
+
+        self.assertIsNone(leaf_ref())
+
+    def test_iter_length_hint(self):
+        data = {"users": {"a": {"score": 1}, "b": {"score": 2}, "c": {}}}
+        path = Structpath.parse("$users.#userId.score")
+
+        results = path.iter(data)
+        self.assertEqual(operator.length_hint(results), 2)
+        next(results)
+        self.assertEqual(operator.length_hint(results), 1)
+        self.assertEqual(list(results), [({"userId": "b"}, 2)])
+        self.assertEqual(operator.length_hint(results), 0)
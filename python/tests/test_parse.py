@@ -40,3 +40,19 @@ class TestStructpathParse(TestCase):
         # Test with escaped characters
         path = Structpath.parse(r"$a\.#var\[0\].c")
         self.assertEqual(str(path), "$a\\.\\#var\\[0\\].c")
+
+    def test_parse_same_string_twice(self):
+        path = Structpath.parse("$user.name")
+        path.push_key("first")
+
+        other = Structpath.parse("$user.name")
+        self.assert_equal(str(path), "$user.name.first")
+        self.assert_equal(str(other), "$user.name")
+
+    def test_str_follows_pushes(self):
+        path = Structpath.parse("$user")
+        self.assert_equal(str(path), "$user")
+
+        path.push_index(0)
+        self.assert_equal(str(path), "$user[0]")
+        self.assert_equal(str(path), "$user[0]")
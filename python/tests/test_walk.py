@@ -1,4 +1,11 @@
+import gc
+import weakref
+from collections import OrderedDict
 from collections.abc import Iterator
+from datetime import datetime
+from functools import reduce
+from inspect import isgenerator
+from operator import getitem
 from typing import Any, Dict
 
 from uneedtest import TestCase
@@ -11,6 +18,14 @@ class TestStructpathWalk(TestCase):
         data = [{1: 1}]
         self.assert_is_instance(Structpath.walk(data), Iterator)
 
+    def test_walk_is_native_iterator(self):
+        walker = Structpath.walk({"a": 1})
+
+        self.assert_false(isgenerator(walker))
+        self.assert_is(iter(walker), walker)
+        self.assert_equal(len(list(walker)), 2)
+        self.assert_equal(list(walker), [])
+
     def test_walk(self):
         simple_data = {"a": {"b": 1, "c": [2, 3, {"d": 4}]}}
 
@@ -22,6 +37,12 @@ class TestStructpathWalk(TestCase):
         self.assert_equal(value_map["$a.c[1]"], 3)
         self.assert_equal(value_map["$a.c[2].d"], 4)
 
+    def test_walk_in_insertion_order(self):
+        data = {"b": {"z": 1, "y": 2}, "a": [3]}
+
+        paths = [str(p) for p, _ in Structpath.walk(data)]
+        self.assert_equal(paths, ["$b.z", "$b.y", "$b", "$a[0]", "$a", "$"])
+
     def test_walk_with_scalar(self):
         """Test walker with a scalar value."""
         data = 42
@@ -244,3 +265,212 @@ class TestStructpathWalk(TestCase):
 
         self.assert_equal(path_value_map["$truthy"], True)
         self.assert_equal(path_value_map["$falsy"], False)
+
+    def test_walk_yields_original_objects(self):
+        stamp = datetime(2024, 12, 24)
+        data = {"a": [{"b": stamp}], "c": (1, 2)}
+
+        value_map = {str(p): v for p, v in Structpath.walk(data)}
+        self.assert_is(value_map["$"], data)
+        self.assert_is(value_map["$a[0]"], data["a"][0])
+        self.assert_is(value_map["$a[0].b"], stamp)
+        self.assert_is(value_map["$c"], data["c"])
+
+    def test_walk_order(self):
+        data = {"a": {"b": 1}, "c": 2}
+        walker = Structpath.walk(data)
+
+        path, value = next(walker)
+        self.assert_equal(str(path), "$a.b")
+        self.assert_equal([str(p) for p, _ in walker], ["$a", "$c", "$"])
+
+    def test_walk_path_strings(self):
+        data = {"a.b": [{"#c": 1}], "x": {"7": 2}}
+
+        paths = [str(path) for path, _ in Structpath.walk(data)]
+        self.assert_equal(
+            paths,
+            [r"$a\.b[0].\#c", r"$a\.b[0]", r"$a\.b", "$x.7", "$x", "$"],
+        )
+
+    def test_walk_container_subclasses(self):
+        class Items(list):
+            pass
+
+        data = OrderedDict(a=Items([1]))
+
+        paths = [str(path) for path, _ in Structpath.walk(data)]
+        self.assert_equal(paths, ["$a[0]", "$a", "$"])
+
+    def test_walks_side_by_side(self):
+        data = {"a": [1, 2], "b": {"c": 3}}
+        expected = [(str(p), v) for p, v in Structpath.walk(data)]
+
+        pairs = list(zip(Structpath.walk(data), Structpath.walk(data)))
+        self.assert_equal([(str(p), v) for (p, v), _ in pairs], expected)
+        self.assert_equal([(str(p), v) for _, (p, v) in pairs], expected)
+
+    def test_walk_batch(self):
+        data = {"a": [1, {"b": None}], "c": {}}
+
+        paths, values = Structpath.walk_batch(data)
+        walked = [(str(p), v) for p, v in Structpath.walk(data)]
+        self.assert_equal(list(zip(paths, values)), walked)
+        self.assert_is(values[-1], data)
+
+    def test_walk_batch_with_scalar(self):
+        self.assert_equal(Structpath.walk_batch(42), (["$"], [42]))
+
+    def test_walk_batch_leaves_only(self):
+        data = {"a": [1, {"b": 2.5}], "c": {}, "d": None}
+
+        paths, values = Structpath.walk_batch(data, leaves_only=True)
+        self.assert_equal(paths, ["$a[0]", "$a[1].b", "$d"])
+        self.assert_equal(values, [1, 2.5, None])
+
+    def test_walked_paths_are_independent(self):
+        data = {"a": {"b": [1, 2]}}
+        walked = list(Structpath.walk(data))
+
+        for path, value in walked:
+            self.assert_is(path.get(data), value)
+
+        first, _ = walked[0]
+        first.push_key("c")
+        self.assert_equal(str(first), "$a.b[0].c")
+        self.assert_equal(str(walked[1][0]), "$a.b[1]")
+        self.assert_equal(repr(walked[1][0]), "Structpath('$a.b[1]')")
+
+    def test_walk_non_canonical_int_keys(self):
+        data = {"007": 1, "+5": 2, "-0": 3, "12": 4}
+        walked = list(Structpath.walk(data))
+
+        self.assert_equal(
+            [str(path) for path, _ in walked],
+            ["$\\007", "$\\+5", "$\\-0", "$12", "$"],
+        )
+        for path, value in walked:
+            self.assert_is(path.get(data), value)
+            self.assert_is(Structpath.parse(str(path)).get(data), value)
+
+    def test_walk_deeply_nested(self):
+        depth = 10_000
+        data = leaf = {}
+        for _ in range(depth):
+            leaf["a"] = {}
+            leaf = leaf["a"]
+        leaf["a"] = [1]
+
+        walker = Structpath.walk(data)
+        path, value = next(walker)
+        self.assert_equal(value, 1)
+        self.assert_equal(str(path), "$a" + ".a" * depth + "[0]")
+        self.assert_equal(path.get(data), 1)
+        self.assert_equal(sum(1 for _ in walker), depth + 2)
+
+        paths, _ = Structpath.walk_batch(data)
+        self.assert_equal(len(paths), depth + 3)
+
+    def test_walk_segments(self):
+        data = {"a": [1, {"b": 2}], 3: None}
+
+        segments = [s for s, _ in Structpath.walk_segments(data)]
+        self.assert_equal(
+            segments,
+            [("a", 0), ("a", 1, "b"), ("a", 1), ("a",), (3,), ()],
+        )
+
+        walked = [v for _, v in Structpath.walk(data)]
+        for (segments, value), expected in zip(
+            Structpath.walk_segments(data), walked
+        ):
+            self.assert_is(value, expected)
+            self.assert_is(reduce(getitem, segments, data), value)
+
+    def test_walk_where_key_pred(self):
+        data = {
+            "users": [{"name": "Ann", "stats": {"logins": 3}}],
+            "metadata": {"version": 1},
+        }
+        seen = []
+
+        def wanted(key):
+            seen.append(key)
+            return isinstance(key, int) or key in ("users", "name")
+
+        paths = [str(p) for p, _ in Structpath.walk_where(data, wanted)]
+        self.assert_equal(paths, ["$users[0].name", "$users[0]", "$users", "$"])
+        self.assert_not_in("version", seen)
+        self.assert_not_in("logins", seen)
+
+    def test_walk_where_key_pred_changes_dict(self):
+        data = {"a": 1, "b": 2}
+
+        def grow(key):
+            data[key * 2] = 0
+            return True
+
+        paths = [str(p) for p, _ in Structpath.walk_where(data, grow)]
+        self.assert_equal(paths, ["$a", "$b", "$"])
+        self.assert_equal(data, {"a": 1, "b": 2, "aa": 0, "bb": 0})
+
+    def test_walk_where_key_pred_changes_list(self):
+        items = ["a", "b", "c"]
+
+        def shrink(idx):
+            if items:
+                items.pop(0)
+            return True
+
+        walked = [(str(p), v) for p, v in Structpath.walk_where(items, shrink)]
+        self.assert_equal(
+            walked,
+            [("$[0]", "a"), ("$[1]", "b"), ("$[2]", "c"), ("$", [])],
+        )
+
+    def test_walk_where_cycle_is_collected(self):
+        class Leaf:
+            pass
+
+        def make_cycle():
+            leaf = Leaf()
+            walkers = []
+
+            def pred(key):
+                return bool(walkers)
+
+            walkers.append(Structpath.walk_where({"a": leaf}, pred))
+            return weakref.ref(leaf)
+
+        leaf_ref = make_cycle()
+        gc.collect()
+
+        self.assert_is_none(leaf_ref())
+
+    def test_walk_where_max_depth(self):
+        data = {"a": {"b": {"c": 1}}, "d": [2, [3]]}
+
+        walked = Structpath.walk_where(data, max_depth=2)
+        self.assert_equal(
+            [(str(p), v) for p, v in walked],
+            [
+                ("$a.b", {"c": 1}),
+                ("$a", {"b": {"c": 1}}),
+                ("$d[0]", 2),
+                ("$d[1]", [3]),
+                ("$d", [2, [3]]),
+                ("$", data),
+            ],
+        )
+        self.assert_equal(
+            [str(p) for p, _ in Structpath.walk_where(data, max_depth=0)],
+            ["$"],
+        )
+
+    def test_walk_where_without_filters(self):
+        data = {"a": [1, {"b": 2}]}
+
+        self.assert_equal(
+            [(str(p), v) for p, v in Structpath.walk_where(data)],
+            [(str(p), v) for p, v in Structpath.walk(data)],
+        )
@@ -51,6 +51,22 @@ class TestStructpathWrite(TestCase):
 
         self.assert_equal(result, {"a": [0, 1, None, None, None, "extended"]})
 
+    def test_write_far_past_the_end(self):
+        class Items(list):
+            def __iadd__(self, other):
+                raise AssertionError("list padded through __iadd__")
+
+        items = Items([0])
+        path = Structpath.parse("$a[1000]")
+
+        result = path.write({"a": items}, "last")
+
+        self.assert_is(result["a"], items)
+        self.assert_equal(len(items), 1001)
+        self.assert_equal(items[0], 0)
+        self.assert_equal(items[1000], "last")
+        self.assert_equal(items[1:1000], [None] * 999)
+
     def test_write_with_numeric_keys(self):
         path = Structpath.parse("$123.456")
         data = {}
@@ -88,6 +104,15 @@ class TestStructpathWrite(TestCase):
             result, {"teams": [None, {"members": {"alice": "developer"}}]}
         )
 
+    def test_write_reads_only_path_variables(self):
+        path = Structpath.parse("$teams[#idx]")
+        vars = {"idx": "0", "unused": object()}
+
+        result = path.write({}, "developer", vars)
+
+        self.assert_equal(result, {"teams": ["developer"]})
+        self.assert_equal(path.get(result, vars), "developer")
+
     def test_write_to_root(self):
         path = Structpath.parse("$")
         data = {}
@@ -181,3 +206,38 @@ class TestStructpathWrite(TestCase):
             "settings": {"theme": "dark"},
         }
         self.assert_equal(result3, expected)
+
+    def test_write_modifies_data_in_place(self):
+        path = Structpath.parse("$a.items[2]")
+        items = [1]
+        data = {"a": {"items": items}}
+
+        result = path.write(data, 3)
+
+        self.assert_is(result, data)
+        self.assert_is(data["a"]["items"], items)
+        self.assert_equal(items, [1, None, 3])
+
+    def test_write_stores_value_object(self):
+        path = Structpath.parse("$a[0]")
+        value = {"b": 1}
+
+        result = path.write([], value)
+
+        self.assert_is(result["a"][0], value)
+
+    def test_write_to_existing_int_key(self):
+        path = Structpath.parse("$items.1.name")
+        data = {"items": {1: {"id": 7}}}
+
+        result = path.write(data, "one")
+
+        self.assert_equal(result, {"items": {1: {"id": 7, "name": "one"}}})
+
+    def test_write_deeply_nested(self):
+        depth = 10_000
+        path = Structpath.parse("$" + "[0]" * depth)
+
+        result = path.write(None, "bottom")
+
+        self.assert_equal(path.get(result), "bottom")
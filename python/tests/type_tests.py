@@ -84,6 +84,17 @@ def test_walk_method_type() -> None:
         path_str: str = str(path)
         any_value: Any = value
 
+    where_result: Iterator[tuple[Structpath, Any]] = Structpath.walk_where(
+        data, lambda key: key != "b", max_depth=2
+    )
+
+    for segments, value in Structpath.walk_segments(data):
+        segments_tuple: tuple[Any, ...] = segments
+
+    paths, values = Structpath.walk_batch(data)
+    path_strs: list[str] = paths
+    any_values: list[Any] = values
+
 
 def test_string_representation_types() -> None:
     path = Structpath()
@@ -1,4 +1,4 @@
-use crate::types::{Segment, SegmentKey, Structpath, StructpathError};
+use crate::types::{SegmentKeyRef, SegmentRef, Structpath, StructpathError};
 use serde_json::Value;
 use std::collections::HashMap;
 
@@ -7,13 +7,8 @@ pub fn get<'a>(
     data: &'a Value,
     vars: Option<&HashMap<String, String>>,
 ) -> Result<&'a Value, StructpathError> {
-    // Check if path contains variables
-    let has_variables = path.segments().iter().any(|segment| {
-        matches!(segment, Segment::KeyVariable(_) | Segment::IndexVariable(_))
-    });
-
     // If path has variables but no vars provided, that's an error
-    if has_variables && vars.is_none() {
+    if path.has_variables() && vars.is_none() {
         return Err(StructpathError::ParseError(
             "Path contains variables, but no variable context was provided."
                 .to_string(),
@@ -22,33 +17,33 @@ pub fn get<'a>(
 
     let mut current = data;
 
-    for segment in path.segments() {
+    for segment in path.iter_segments() {
         match segment {
-            Segment::Key(key) => {
-                current = get_by_key(current, key)?;
+            SegmentRef::Key(key) => {
+                current = get_by_key(current, &key)?;
             }
-            Segment::Index(idx) => {
-                current = get_by_index(current, *idx)?;
+            SegmentRef::Index(idx) => {
+                current = get_by_index(current, idx)?;
             }
-            Segment::KeyVariable(var_name) => {
+            SegmentRef::KeyVariable(var_name) => {
                 // Safe to unwrap here because we already checked that vars is Some if path has variables
                 let variables = vars.unwrap();
 
                 // Resolve the variable value from the provided context
                 let var_value = variables.get(var_name).ok_or_else(|| {
-                    StructpathError::MissingVariable(var_name.clone())
+                    StructpathError::MissingVariable(var_name.to_string())
                 })?;
 
                 // Use it as a string key - this is a key variable
                 current = get_by_string_key(current, var_value)?;
             }
-            Segment::IndexVariable(var_name) => {
+            SegmentRef::IndexVariable(var_name) => {
                 // Safe to unwrap here because we already checked that vars is Some if path has variables
                 let variables = vars.unwrap();
 
                 // Resolve the variable value from the provided context
                 let var_value = variables.get(var_name).ok_or_else(|| {
-                    StructpathError::MissingVariable(var_name.clone())
+                    StructpathError::MissingVariable(var_name.to_string())
                 })?;
 
                 // Parse as index - this is an index variable
@@ -66,24 +61,21 @@ pub fn get<'a>(
 
 fn get_by_key<'a>(
     data: &'a Value,
-    key: &SegmentKey,
+    key: &SegmentKeyRef,
 ) -> Result<&'a Value, StructpathError> {
     if let Value::Object(map) = data {
-        let lookup_key = match key {
-            SegmentKey::String(s) => s.clone(),
-            SegmentKey::Int(i) => i.to_string(),
+        let value = match key {
+            SegmentKeyRef::String(s) => map.get(*s),
+            SegmentKeyRef::Int(i) => map.get(&i.to_string()),
         };
 
-        if let Some(value) = map.get(&lookup_key) {
+        if let Some(value) = value {
             Ok(value)
         } else {
             Err(StructpathError::NotFound)
         }
     } else {
-        Err(StructpathError::InvalidPath {
-            expected: "object".to_string(),
-            found: format!("{:?}", data),
-        })
+        Err(StructpathError::invalid_path("object", data))
     }
 }
 
@@ -98,10 +90,7 @@ fn get_by_string_key<'a>(
             Err(StructpathError::NotFound)
         }
     } else {
-        Err(StructpathError::InvalidPath {
-            expected: "object".to_string(),
-            found: format!("{:?}", data),
-        })
+        Err(StructpathError::invalid_path("object", data))
     }
 }
 
@@ -117,10 +106,7 @@ fn get_by_index(data: &Value, idx: usize) -> Result<&Value, StructpathError> {
             )))
         }
     } else {
-        Err(StructpathError::InvalidPath {
-            expected: "array".to_string(),
-            found: format!("{:?}", data),
-        })
+        Err(StructpathError::invalid_path("array", data))
     }
 }
 
@@ -172,6 +158,16 @@ mod tests {
         let path = parse("$a.b").unwrap();
         let result = get(&path, &data, None);
         assert!(matches!(result, Err(StructpathError::InvalidPath { .. })));
+
+        let data = json!({"a": [{"b": 1}, {"c": 2}]});
+        let path = parse("$a.b").unwrap();
+        match get(&path, &data, None) {
+            Err(StructpathError::InvalidPath { expected, found }) => {
+                assert_eq!(expected, "object");
+                assert_eq!(found, "array");
+            }
+            other => panic!("unexpected result: {:?}", other),
+        }
     }
 
     #[test]
@@ -0,0 +1,171 @@
+use crate::types::{Structpath, StructpathError};
+use std::collections::{HashMap, VecDeque};
+use std::sync::Mutex;
+
+/// Maximum number of distinct path strings kept by the shared cache
+const CAPACITY: usize = 4096;
+
+static CACHE: Mutex<Option<ParseCache>> = Mutex::new(None);
+
+/// A bounded cache of parsed paths, keyed by their source string
+///
+/// When the cache is full, the least recently used entries are evicted
+/// first, approximated with the second-chance ("clock") scheme: a hit only
+/// marks its entry as used, and an entry that is marked when its turn to be
+/// evicted comes is unmarked and kept for another round instead. Hits thus
+/// never reorder anything, and paths parsed over and over stay cached while
+/// one-off paths pass through.
+pub struct ParseCache {
+    capacity: usize,
+    entries: HashMap<String, Entry>,
+    order: VecDeque<String>,
+}
+
+struct Entry {
+    path: Structpath,
+    used: bool,
+}
+
+impl ParseCache {
+    pub fn new(capacity: usize) -> Self {
+        ParseCache {
+            capacity,
+            entries: HashMap::new(),
+            order: VecDeque::new(),
+        }
+    }
+
+    /// Parse a path string, reusing a previous result for the same input
+    ///
+    /// The returned path is a copy of the cached one, so callers are free to
+    /// extend it without affecting later lookups. Parse errors are not cached.
+    pub fn parse(
+        &mut self,
+        path_str: &str,
+    ) -> Result<Structpath, StructpathError> {
+        if let Some(entry) = self.entries.get_mut(path_str) {
+            entry.used = true;
+            return Ok(entry.path.clone());
+        }
+
+        let path = Structpath::parse(path_str)?;
+
+        if self.capacity == 0 {
+            return Ok(path);
+        }
+
+        while self.entries.len() >= self.capacity {
+            let Some(oldest) = self.order.pop_front() else {
+                break;
+            };
+            match self.entries.get_mut(&oldest) {
+                Some(entry) if entry.used => {
+                    entry.used = false;
+                    self.order.push_back(oldest);
+                }
+                _ => {
+                    self.entries.remove(&oldest);
+                }
+            }
+        }
+
+        self.order.push_back(path_str.to_string());
+        self.entries.insert(
+            path_str.to_string(),
+            Entry {
+                path: path.clone(),
+                used: false,
+            },
+        );
+
+        Ok(path)
+    }
+
+    #[cfg(test)]
+    pub fn len(&self) -> usize {
+        self.entries.len()
+    }
+
+    #[cfg(test)]
+    pub fn is_empty(&self) -> bool {
+        self.entries.is_empty()
+    }
+}
+
+/// Parse a path string through the process-wide cache
+pub fn parse_cached(path_str: &str) -> Result<Structpath, StructpathError> {
+    let mut cache = CACHE.lock().unwrap();
+    cache
+        .get_or_insert_with(|| ParseCache::new(CAPACITY))
+        .parse(path_str)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_cache_hit_returns_equal_path() {
+        let mut cache = ParseCache::new(4);
+
+        let first = cache.parse("$a[0].b").unwrap();
+        let second = cache.parse("$a[0].b").unwrap();
+
+        assert_eq!(first, second);
+        assert_eq!(cache.len(), 1);
+    }
+
+    #[test]
+    fn test_cached_copy_is_independent() {
+        let mut cache = ParseCache::new(4);
+
+        let mut path = cache.parse("$a").unwrap();
+        path.push_string_key("b");
+
+        let cached = cache.parse("$a").unwrap();
+        assert_eq!(format!("{}", cached), "$a");
+    }
+
+    #[test]
+    fn test_cache_evicts_oldest_entry() {
+        let mut cache = ParseCache::new(2);
+
+        cache.parse("$a").unwrap();
+        cache.parse("$b").unwrap();
+        cache.parse("$c").unwrap();
+
+        assert_eq!(cache.len(), 2);
+        assert!(!cache.entries.contains_key("$a"));
+        assert!(cache.entries.contains_key("$b"));
+        assert!(cache.entries.contains_key("$c"));
+    }
+
+    #[test]
+    fn test_cache_keeps_recently_used_entry() {
+        let mut cache = ParseCache::new(2);
+
+        cache.parse("$a").unwrap();
+        cache.parse("$b").unwrap();
+        cache.parse("$a").unwrap();
+        cache.parse("$c").unwrap();
+
+        assert_eq!(cache.len(), 2);
+        assert!(cache.entries.contains_key("$a"));
+        assert!(!cache.entries.contains_key("$b"));
+        assert!(cache.entries.contains_key("$c"));
+    }
+
+    #[test]
+    fn test_cache_does_not_store_errors() {
+        let mut cache = ParseCache::new(2);
+
+        assert!(cache.parse("$a[unclosed").is_err());
+        assert!(cache.is_empty());
+    }
+
+    #[test]
+    fn test_parse_cached() {
+        let path = parse_cached("$users[0].name").unwrap();
+        assert_eq!(path, Structpath::parse("$users[0].name").unwrap());
+    }
+}
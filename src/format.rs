@@ -1,92 +1,81 @@
-use crate::types::{Segment, SegmentKey, Structpath};
+use crate::types::{SegmentKeyRef, SegmentRef, Structpath};
+use std::fmt::{self, Write};
 
 pub fn to_string(path: &Structpath) -> String {
-    if path.segments().is_empty() {
-        return "$".to_string();
-    }
+    // Keys and variable names plus separators and brackets, usually enough
+    let mut result =
+        String::with_capacity(1 + path.text_len() + 4 * path.len());
+    write_path(&mut result, path).expect("writing to a String cannot fail");
+    result
+}
 
-    let mut result = String::from("$");
+/// Write the string form of `path` to `out`, segment by segment
+///
+/// Nothing is allocated along the way: keys are written in unescaped runs
+/// and numbers are formatted straight into the output.
+pub fn write_path<W: Write>(out: &mut W, path: &Structpath) -> fmt::Result {
+    out.write_char('$')?;
     let mut first = true;
 
-    for segment in path.segments() {
-        match segment {
-            Segment::Key(key) => {
-                format_key_segment(&mut result, key, &mut first);
-            }
-            Segment::Index(idx) => {
-                result.push_str(&format!("[{}]", idx));
-            }
-            Segment::KeyVariable(var_name) => {
-                format_key_variable(&mut result, var_name, &mut first);
-            }
-            Segment::IndexVariable(var_name) => {
-                format_index_variable(&mut result, var_name);
-            }
-        }
+    for segment in path.iter_segments() {
+        write_segment(out, segment, &mut first)?;
     }
 
-    result
+    Ok(())
 }
 
-fn format_key_segment(result: &mut String, key: &SegmentKey, first: &mut bool) {
-    match key {
-        SegmentKey::String(string_key) => {
-            format_string_key(result, string_key, first);
+/// Write a single segment, as it appears after the segments before it
+///
+/// `first` tracks whether a key has been written yet, which decides if a
+/// key needs a leading `.`; it must start out `true` after the `$`.
+pub fn write_segment<W: Write>(
+    out: &mut W,
+    segment: SegmentRef,
+    first: &mut bool,
+) -> fmt::Result {
+    match segment {
+        SegmentRef::Key(key) => {
+            write_separator(out, first)?;
+            match key {
+                SegmentKeyRef::String(string_key) => {
+                    if string_key.parse::<i64>().is_ok() {
+                        out.write_char('\\')?;
+                    }
+                    write_escaped(out, string_key)
+                }
+                SegmentKeyRef::Int(int_key) => write!(out, "{}", int_key),
+            }
         }
-        SegmentKey::Int(int_key) => {
-            format_int_key(result, *int_key, first);
+        SegmentRef::Index(idx) => write!(out, "[{}]", idx),
+        SegmentRef::KeyVariable(var_name) => {
+            write_separator(out, first)?;
+            out.write_char('#')?;
+            out.write_str(var_name)
         }
+        SegmentRef::IndexVariable(var_name) => write!(out, "[#{}]", var_name),
     }
 }
 
-fn format_string_key(result: &mut String, string_key: &str, first: &mut bool) {
-    if *first {
-        *first = false;
-    } else {
-        result.push('.');
-    }
-
-    if string_key.parse::<i64>().is_ok() {
-        result.push('\\');
-    }
-
-    result.push_str(&escape_special_chars(string_key));
-}
-
-fn format_int_key(result: &mut String, int_key: i64, first: &mut bool) {
+fn write_separator<W: Write>(out: &mut W, first: &mut bool) -> fmt::Result {
     if *first {
         *first = false;
+        Ok(())
     } else {
-        result.push('.');
+        out.write_char('.')
     }
-
-    result.push_str(&int_key.to_string());
 }
 
-fn format_key_variable(result: &mut String, var_name: &str, first: &mut bool) {
-    if *first {
-        *first = false;
-    } else {
-        result.push('.');
+fn write_escaped<W: Write>(out: &mut W, s: &str) -> fmt::Result {
+    let mut start = 0;
+    for (i, c) in s.char_indices() {
+        // Also escape # so keys are not read back as variables
+        if matches!(c, '.' | '[' | ']' | '\\' | '#') {
+            out.write_str(&s[start..i])?;
+            out.write_char('\\')?;
+            start = i;
+        }
     }
-
-    // Format key variable with leading #
-    result.push('#');
-    result.push_str(var_name);
-}
-
-fn format_index_variable(result: &mut String, var_name: &str) {
-    // Format index variable with [#name]
-    result.push_str(&format!("[#{}]", var_name));
-}
-
-fn escape_special_chars(s: &str) -> String {
-    s.chars()
-        .map(|c| match c {
-            '.' | '[' | ']' | '\\' | '#' => format!("\\{}", c), // Also escape # character
-            _ => c.to_string(),
-        })
-        .collect::<String>()
+    out.write_str(&s[start..])
 }
 
 #[cfg(test)]
@@ -154,6 +143,13 @@ mod tests {
         assert_eq!(path_str, r"$a.\#notvar.c");
     }
 
+    #[test]
+    fn test_display_matches_to_string() {
+        let path = parse::parse(r"$a\.b[3].#k[#i].\12.x\[y\]").unwrap();
+        assert_eq!(format!("{}", path), to_string(&path));
+        assert_eq!(to_string(&Structpath::new()), "$");
+    }
+
     #[test]
     fn test_roundtrip() {
         let path_strs = vec![
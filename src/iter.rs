@@ -1,4 +1,4 @@
-use crate::types::{Segment, Structpath};
+use crate::types::{SegmentRef, Structpath};
 use serde_json::Value;
 use std::collections::{HashMap, HashSet, VecDeque};
 
@@ -43,7 +43,7 @@ impl<'a> Iterator for VariableIterator<'a> {
     fn next(&mut self) -> Option<Self::Item> {
         while let Some(state) = self.stack.pop_front() {
             // If we've processed all segments, we found a match
-            if state.current_segment_idx >= self.path.segments().len() {
+            if state.current_segment_idx >= self.path.len() {
                 // Create a unique key for this result to avoid duplicates
                 let key = format!("{:?}", state.variable_values);
                 if !self.visited.insert(key) {
@@ -54,14 +54,13 @@ impl<'a> Iterator for VariableIterator<'a> {
             }
 
             // Get the current segment to process
-            let current_segment =
-                &self.path.segments()[state.current_segment_idx];
+            let current_segment = self.path.segment(state.current_segment_idx);
 
             match current_segment {
-                Segment::Key(key_segment) => {
+                SegmentRef::Key(key_segment) => {
                     // Try to navigate to the next level using the key
                     match key_segment {
-                        crate::types::SegmentKey::String(key) => {
+                        crate::types::SegmentKeyRef::String(key) => {
                             if let Value::Object(map) = state.value {
                                 if let Some(next_value) = map.get(key) {
                                     let mut new_state = state.clone();
@@ -71,7 +70,7 @@ impl<'a> Iterator for VariableIterator<'a> {
                                 }
                             }
                         }
-                        crate::types::SegmentKey::Int(key) => {
+                        crate::types::SegmentKeyRef::Int(key) => {
                             let key_str = key.to_string();
                             if let Value::Object(map) = state.value {
                                 if let Some(next_value) = map.get(&key_str) {
@@ -84,10 +83,10 @@ impl<'a> Iterator for VariableIterator<'a> {
                         }
                     }
                 }
-                Segment::Index(idx) => {
+                SegmentRef::Index(idx) => {
                     // Try to navigate to the next level using the array index
                     if let Value::Array(arr) = state.value {
-                        if let Some(next_value) = arr.get(*idx) {
+                        if let Some(next_value) = arr.get(idx) {
                             let mut new_state = state.clone();
                             new_state.value = next_value;
                             new_state.current_segment_idx += 1;
@@ -95,7 +94,7 @@ impl<'a> Iterator for VariableIterator<'a> {
                         }
                     }
                 }
-                Segment::KeyVariable(var_name) => {
+                SegmentRef::KeyVariable(var_name) => {
                     // Handle key variable
                     if let Value::Object(map) = state.value {
                         // Try all object keys as possible values for the variable
@@ -103,7 +102,7 @@ impl<'a> Iterator for VariableIterator<'a> {
                             let mut new_state = state.clone();
                             // Store key as a string Value
                             new_state.variable_values.insert(
-                                var_name.clone(),
+                                var_name.to_string(),
                                 Value::String(key.clone()),
                             );
                             new_state.value = next_value;
@@ -112,7 +111,7 @@ impl<'a> Iterator for VariableIterator<'a> {
                         }
                     }
                 }
-                Segment::IndexVariable(var_name) => {
+                SegmentRef::IndexVariable(var_name) => {
                     // Handle index variable
                     if let Value::Array(arr) = state.value {
                         // Try all array indices as possible values for the variable
@@ -120,7 +119,7 @@ impl<'a> Iterator for VariableIterator<'a> {
                             let mut new_state = state.clone();
                             // Store index as a number Value
                             new_state.variable_values.insert(
-                                var_name.clone(),
+                                var_name.to_string(),
                                 Value::Number(serde_json::Number::from(
                                     idx as u64,
                                 )),
@@ -2,20 +2,26 @@
 
 use pyo3::exceptions::{PyIndexError, PyKeyError, PyTypeError, PyValueError};
 use pyo3::prelude::*;
-use pyo3::types::{PyDict, PyTuple};
-use serde_json::Value;
-use std::collections::{HashMap, VecDeque};
+use pyo3::types::{PyDict, PyList, PyString, PyTuple};
+use pyo3::{PyTraverseError, PyVisit};
+use std::cell::OnceCell;
+use std::sync::Arc;
 
 mod access;
+mod cache;
 mod format;
 mod iter;
 mod parse;
-mod serialization;
+mod program;
+mod traverse;
 mod types;
 mod walk;
 mod write;
 
-pub use types::{Segment, SegmentKey, Structpath, StructpathError};
+pub use types::{
+    Segment, SegmentKey, SegmentKeyRef, SegmentRef, Segments, Structpath,
+    StructpathError,
+};
 
 #[cfg(feature = "extension-module")]
 #[pymodule]
@@ -29,23 +35,96 @@ pub fn _structpath(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
 #[pyclass(name = "Structpath")]
 #[derive(Clone)]
 struct PyStructpath {
-    inner: Structpath,
+    /// The segments; for paths from `walk`, built from `walked` when first
+    /// needed, since most of those are only ever turned into strings
+    inner: OnceCell<Structpath>,
+    walked: Option<Arc<traverse::PathNode>>,
+    /// Boxed: many paths, such as those made by `walk`, are never run, and
+    /// an unbuilt program should only cost them a pointer
+    program: OnceCell<Box<program::Program>>,
+    text: OnceCell<Py<PyString>>,
 }
 
-#[derive(Clone)]
-struct WalkerState {
-    path: Structpath,
-    value: Value,
+impl PyStructpath {
+    fn wrap(inner: Structpath) -> Self {
+        PyStructpath {
+            inner: OnceCell::from(inner),
+            walked: None,
+            program: OnceCell::new(),
+            text: OnceCell::new(),
+        }
+    }
+
+    /// A path reached by a walk, with its string form already known
+    fn walked(node: Option<Arc<traverse::PathNode>>, text: &PyString) -> Self {
+        PyStructpath {
+            inner: OnceCell::new(),
+            walked: node,
+            program: OnceCell::new(),
+            text: OnceCell::from(Py::from(text)),
+        }
+    }
+
+    fn inner(&self) -> &Structpath {
+        self.inner.get_or_init(|| match &self.walked {
+            Some(node) => node.to_path(),
+            None => Structpath::new(),
+        })
+    }
+
+    /// The segments, to be changed; this ends sharing with the walk
+    fn inner_mut(&mut self) -> &mut Structpath {
+        self.inner();
+        self.walked = None;
+        self.inner.get_mut().expect("initialized above")
+    }
+
+    /// Drop everything derived from the segments, before they change
+    fn invalidate(&mut self) {
+        self.program.take();
+        self.text.take();
+    }
+
+    fn program(&self, py: Python<'_>) -> &program::Program {
+        self.program
+            .get_or_init(|| Box::new(program::Program::new(py, self.inner())))
+    }
+
+    fn error(&self, err: StructpathError) -> PyErr {
+        match err {
+            StructpathError::NotFound => {
+                PyKeyError::new_err(format!("Path not found: {}", self.inner()))
+            }
+            err => py_error(err),
+        }
+    }
+}
+
+/// The Python exception for an error, other than a path not being found
+fn py_error(err: StructpathError) -> PyErr {
+    match err {
+        StructpathError::InvalidPath { expected, found } => {
+            PyTypeError::new_err(format!(
+                "Invalid path: expected {}, found {}",
+                expected, found
+            ))
+        }
+        StructpathError::IndexOutOfBounds(msg) => PyIndexError::new_err(msg),
+        StructpathError::MissingVariable(var_name) => PyValueError::new_err(
+            format!("Missing variable in context: {}", var_name),
+        ),
+        _ => PyValueError::new_err(err.to_string()),
+    }
 }
 
 #[pyclass(name = "Walker")]
 struct PyWalker {
-    stack: VecDeque<WalkerState>,
+    walker: traverse::Walker,
 }
 
 #[pyclass(name = "VariableIterator")]
 struct PyVariableIterator {
-    results: Vec<(Value, HashMap<String, Value>)>,
+    results: Vec<PyObject>,
     current_pos: usize,
 }
 
@@ -66,54 +145,46 @@ impl PyVariableIterator {
     fn __next__(
         mut slf: PyRefMut<'_, Self>,
         py: Python<'_>,
-    ) -> PyResult<Option<PyObject>> {
+    ) -> Option<PyObject> {
         if slf.current_pos < slf.results.len() {
             let idx = slf.current_pos;
             slf.current_pos += 1;
-            let (ref value, ref vars) = slf.results[idx];
+            return Some(std::mem::replace(&mut slf.results[idx], py.None()));
+        }
+        None
+    }
 
-            let py_vars = PyDict::new(py);
-            for (k, v) in vars {
-                py_vars.set_item(k, serialization::deserialize(v, py)?)?;
-            }
+    /// Number of remaining results, so `list()` can size its buffer once
+    fn __length_hint__(&self) -> usize {
+        self.results.len() - self.current_pos
+    }
 
-            let result = PyTuple::new(
-                py,
-                &[
-                    py_vars.to_object(py),
-                    serialization::deserialize(value, py)?,
-                ],
-            );
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        for result in &self.results[self.current_pos..] {
+            visit.call(result)?;
+        }
+        Ok(())
+    }
 
-            return Ok(Some(result.to_object(py)));
+    fn __clear__(&mut self) {
+        self.results.clear();
+        self.current_pos = 0;
+    }
+}
+
+impl PyWalker {
+    fn with_options(data: &PyAny, options: traverse::WalkOptions) -> Self {
+        PyWalker {
+            walker: traverse::Walker::new(data, options),
         }
-        Ok(None)
     }
 }
 
 #[pymethods]
 impl PyWalker {
     #[new]
-    fn new(data: &PyAny) -> PyResult<Self> {
-        let json_data = serialization::serialize(data)?;
-
-        // Initialize stack with an empty result list
-        let mut stack = VecDeque::new();
-
-        // Set up our walker to mimic the Rust implementation
-        let rust_walker = walk::new_walker(&json_data);
-
-        // Collect all pairs from the walker
-        let results: Vec<(Structpath, Value)> = rust_walker
-            .map(|(path, value)| (path, value.clone()))
-            .collect();
-
-        // Prepare them for Python iteration
-        for (path, value) in results {
-            stack.push_back(WalkerState { path, value });
-        }
-
-        Ok(PyWalker { stack })
+    fn new(data: &PyAny) -> Self {
+        PyWalker::with_options(data, traverse::WalkOptions::default())
     }
 
     fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
@@ -124,14 +195,24 @@ impl PyWalker {
         mut slf: PyRefMut<'_, Self>,
         py: Python<'_>,
     ) -> PyResult<Option<(PyObject, PyObject)>> {
-        if let Some(state) = slf.stack.pop_front() {
-            // Convert to Python objects
-            let path_obj = PyStructpath { inner: state.path }.into_py(py);
-            let value_obj = serialization::deserialize(&state.value, py)?;
+        let Some(value) = slf.walker.advance(py)? else {
+            return Ok(None);
+        };
+        let path = if slf.walker.options().segments {
+            slf.walker.segments(py).into_py(py)
+        } else {
+            let text = PyString::new(py, slf.walker.text());
+            PyStructpath::walked(slf.walker.node(), text).into_py(py)
+        };
+        Ok(Some((path, value)))
+    }
 
-            return Ok(Some((path_obj, value_obj)));
-        }
-        Ok(None)
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        self.walker.traverse(&visit)
+    }
+
+    fn __clear__(&mut self) {
+        self.walker.clear();
     }
 }
 
@@ -139,16 +220,14 @@ impl PyWalker {
 impl PyStructpath {
     #[new]
     fn new() -> Self {
-        PyStructpath {
-            inner: Structpath::new(),
-        }
+        PyStructpath::wrap(Structpath::new())
     }
 
     #[staticmethod]
     #[pyo3(name = "parse")]
     fn py_parse(path_str: &str) -> PyResult<Self> {
-        match Structpath::parse(path_str) {
-            Ok(inner) => Ok(PyStructpath { inner }),
+        match Structpath::parse_cached(path_str) {
+            Ok(inner) => Ok(PyStructpath::wrap(inner)),
             Err(err) => match err {
                 StructpathError::DuplicateVariable(name) => {
                     Err(PyValueError::new_err(format!(
@@ -162,11 +241,12 @@ impl PyStructpath {
     }
 
     fn push_key(&mut self, key: &PyAny) -> PyResult<()> {
-        if let Ok(int_key) = key.extract::<i64>() {
-            self.inner.push_int_key(int_key);
+        self.invalidate();
+        if let Ok(str_key) = key.downcast::<PyString>() {
+            self.inner_mut().push_string_key(str_key.to_str()?);
             Ok(())
-        } else if let Ok(str_key) = key.extract::<String>() {
-            self.inner.push_string_key(&str_key);
+        } else if let Ok(int_key) = key.extract::<i64>() {
+            self.inner_mut().push_int_key(int_key);
             Ok(())
         } else {
             Err(PyTypeError::new_err("Key must be a string or integer"))
@@ -174,11 +254,13 @@ impl PyStructpath {
     }
 
     fn push_index(&mut self, index: usize) {
-        self.inner.push_index(index);
+        self.invalidate();
+        self.inner_mut().push_index(index);
     }
 
     fn push_key_variable(&mut self, name: &str) -> PyResult<()> {
-        match self.inner.push_key_variable(name) {
+        self.invalidate();
+        match self.inner_mut().push_key_variable(name) {
             Ok(()) => Ok(()),
             Err(err) => match err {
                 StructpathError::DuplicateVariable(name) => {
@@ -193,7 +275,8 @@ impl PyStructpath {
     }
 
     fn push_index_variable(&mut self, name: &str) -> PyResult<()> {
-        match self.inner.push_index_variable(name) {
+        self.invalidate();
+        match self.inner_mut().push_index_variable(name) {
             Ok(()) => Ok(()),
             Err(err) => match err {
                 StructpathError::DuplicateVariable(name) => {
@@ -209,60 +292,28 @@ impl PyStructpath {
 
     #[pyo3(signature = (data, vars = None))]
     fn get(&self, data: &PyAny, vars: Option<&PyDict>) -> PyResult<PyObject> {
-        let value = serialization::serialize(data)?;
-
-        let rust_vars = match vars {
-            Some(dict) => {
-                let mut vars_map = HashMap::new();
-                for (key, value) in dict.iter() {
-                    let key_str = key.extract::<String>()?;
-                    let value_str = value.extract::<String>()?;
-                    vars_map.insert(key_str, value_str);
-                }
-                Some(vars_map)
-            }
-            None => None,
-        };
-
-        let vars_ref =
-            rust_vars.as_ref().map(|v| v as &HashMap<String, String>);
+        let program = self.program(data.py());
+        let resolved = program.resolve(data.py(), vars)?;
 
-        match self.inner.get(&value, vars_ref) {
-            Ok(result) => serialization::deserialize(result, data.py()),
-            Err(err) => match err {
-                StructpathError::NotFound => Err(PyKeyError::new_err(format!(
-                    "Path not found: {}",
-                    self.inner
-                ))),
-                StructpathError::InvalidPath { expected, found } => {
-                    Err(PyTypeError::new_err(format!(
-                        "Invalid path: expected {}, found {}",
-                        expected, found
-                    )))
-                }
-                StructpathError::IndexOutOfBounds(msg) => {
-                    Err(PyIndexError::new_err(msg))
-                }
-                StructpathError::MissingVariable(var_name) => {
-                    Err(PyValueError::new_err(format!(
-                        "Missing variable in context: {}",
-                        var_name
-                    )))
-                }
-                _ => Err(PyValueError::new_err(err.to_string())),
-            },
+        match traverse::get(program, &resolved, data) {
+            Ok(result) => Ok(result.into_py(data.py())),
+            Err(err) => Err(self.error(err)),
         }
     }
 
     fn iter(&self, data: &PyAny) -> PyResult<PyVariableIterator> {
-        let json_data = serialization::serialize(data)?;
+        let py = data.py();
+        let results = traverse::iter(py, self.program(py), data, true)?;
 
-        let rust_iter = iter::iter_variables(&self.inner, &json_data);
-        let mut results = Vec::new();
+        Ok(PyVariableIterator {
+            results,
+            current_pos: 0,
+        })
+    }
 
-        for (value, vars) in rust_iter {
-            results.push((value.clone(), vars));
-        }
+    fn iter_values(&self, data: &PyAny) -> PyResult<PyVariableIterator> {
+        let py = data.py();
+        let results = traverse::iter(py, self.program(py), data, false)?;
 
         Ok(PyVariableIterator {
             results,
@@ -273,99 +324,82 @@ impl PyStructpath {
     #[pyo3(signature = (data = None, value = None, vars = None))]
     fn write(
         &self,
+        py: Python<'_>,
         data: Option<&PyAny>,
         value: Option<&PyAny>,
         vars: Option<&PyDict>,
     ) -> PyResult<PyObject> {
-        let mut json_data = match &data {
-            Some(py_data) => serialization::serialize(py_data)?,
-            None => Value::Null,
-        };
+        let program = self.program(py);
+        let resolved = program.resolve(py, vars)?;
+
+        let value = value.unwrap_or_else(|| py.None().into_ref(py));
+        traverse::write(py, program, &resolved, data, value)
+    }
 
-        let json_value = match value {
-            Some(val) => serialization::serialize(val)?,
-            None => Value::Null,
+    #[staticmethod]
+    #[pyo3(name = "walk")]
+    fn py_walk(data: &PyAny) -> PyWalker {
+        PyWalker::new(data)
+    }
+
+    #[staticmethod]
+    #[pyo3(signature = (data, key_pred = None, max_depth = None))]
+    fn walk_where(
+        data: &PyAny,
+        key_pred: Option<PyObject>,
+        max_depth: Option<usize>,
+    ) -> PyWalker {
+        let options = traverse::WalkOptions {
+            key_pred,
+            max_depth,
+            ..Default::default()
         };
+        PyWalker::with_options(data, options)
+    }
 
-        let rust_vars = match vars {
-            Some(dict) => {
-                let mut vars_map = HashMap::new();
-                for (key, val) in dict.iter() {
-                    let key_str = key.extract::<String>()?;
-                    let value_str = val.extract::<String>()?;
-                    vars_map.insert(key_str, value_str);
-                }
-                Some(vars_map)
-            }
-            None => None,
+    #[staticmethod]
+    fn walk_segments(data: &PyAny) -> PyWalker {
+        let options = traverse::WalkOptions {
+            segments: true,
+            ..Default::default()
         };
+        PyWalker::with_options(data, options)
+    }
 
-        let vars_ref =
-            rust_vars.as_ref().map(|v| v as &HashMap<String, String>);
-
-        match self.inner.write(Some(&mut json_data), json_value, vars_ref) {
-            Ok(result) => {
-                let py = match value {
-                    Some(val) => val.py(),
-                    None => unsafe { Python::assume_gil_acquired() },
-                };
-
-                // Update the original Python object if provided (for side effects)
-                if let Some(py_data) = data {
-                    if !py_data.is_none() {
-                        // Check if it's a dictionary that can be modified
-                        if let Ok(dict) = py_data.downcast::<PyDict>() {
-                            // Clear the original dict
-                            dict.clear();
-
-                            // Deserialize the result to a Python object
-                            let result_obj =
-                                serialization::deserialize(&result, py)?;
-
-                            // Try to get it as a dictionary
-                            if let Ok(result_dict) =
-                                result_obj.extract::<&PyDict>(py)
-                            {
-                                // Copy all items from result_dict to the original dict
-                                for (key, value) in result_dict.iter() {
-                                    let _ = dict.set_item(key, value);
-                                }
-                            }
-                        }
-                    }
-                }
+    #[staticmethod]
+    #[pyo3(signature = (data, leaves_only = false))]
+    fn walk_batch(
+        py: Python<'_>,
+        data: &PyAny,
+        leaves_only: bool,
+    ) -> PyResult<Py<PyTuple>> {
+        let options = traverse::WalkOptions {
+            leaves_only,
+            ..Default::default()
+        };
+        let mut walker = traverse::Walker::new(data, options);
+        let mut paths = Vec::new();
+        let mut values = Vec::new();
 
-                serialization::deserialize(&result, py)
-            }
-            Err(err) => match err {
-                StructpathError::InvalidPath { expected, found } => {
-                    Err(PyTypeError::new_err(format!(
-                        "Invalid path: expected {}, found {}",
-                        expected, found
-                    )))
-                }
-                StructpathError::MissingVariable(var_name) => {
-                    Err(PyValueError::new_err(format!(
-                        "Missing variable in context: {}",
-                        var_name
-                    )))
-                }
-                _ => Err(PyValueError::new_err(err.to_string())),
-            },
+        while let Some(value) = walker.advance(py)? {
+            paths.push(PyString::new(py, walker.text()));
+            values.push(value);
         }
-    }
 
-    #[staticmethod]
-    #[pyo3(name = "walk")]
-    fn py_walk(data: &PyAny) -> PyResult<PyWalker> {
-        PyWalker::new(data)
+        let paths = PyList::new(py, paths);
+        let values = PyList::new(py, values);
+        Ok(PyTuple::new(py, [paths.as_ref(), values.as_ref()]).into())
     }
 
-    fn __str__(&self) -> String {
-        format!("{}", self.inner)
+    fn __str__(&self, py: Python<'_>) -> Py<PyString> {
+        self.text
+            .get_or_init(|| {
+                PyString::new(py, &format::to_string(self.inner())).into()
+            })
+            .clone_ref(py)
     }
 
     fn __repr__(&self) -> String {
-        format!("Structpath('{}')", self.inner)
+        format!("Structpath('{}')", self.inner())
     }
 }
@@ -0,0 +1,335 @@
+//! Paths compiled for traversing Python objects
+//!
+//! A `Program` is built once per path and holds it in the form the
+//! traversals in `traverse` execute: a flat list of ops with the Python key
+//! objects already created, and a slot number for each variable. Running a
+//! program is a single loop over its ops, without decoding segments or
+//! converting keys on the way.
+
+use crate::types::{SegmentKeyRef, SegmentRef, Structpath, StructpathError};
+use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyString};
+
+/// A compiled path
+///
+/// Ops are stored as parallel arrays rather than a list of enums: `kinds`
+/// holds one tag per op, `args` its index or variable slot, and `key_ends`
+/// the end of its run in `keys`, the same way `Structpath` stores its
+/// segments. Checking what kind of container an op needs only reads
+/// `kinds`, and all the key objects of a path sit in one allocation.
+///
+/// A program does not change once built, so the arrays are boxed slices
+/// of exactly the right length; kinds take one byte per op, and run ends
+/// four.
+#[derive(Clone)]
+pub struct Program {
+    kinds: Box<[OpKind]>,
+    args: Box<[usize]>,
+    key_ends: Box<[u32]>,
+    keys: Box<[KeyObject]>,
+    names: Box<[Box<str>]>,
+    py_names: Box<[Py<PyString>]>,
+}
+
+/// The arrays of a program being built
+#[derive(Default)]
+struct Builder {
+    kinds: Vec<OpKind>,
+    args: Vec<usize>,
+    key_ends: Vec<u32>,
+    keys: Vec<KeyObject>,
+    names: Vec<Box<str>>,
+}
+
+impl Builder {
+    fn push(&mut self, kind: OpKind, arg: usize) {
+        self.kinds.push(kind);
+        self.args.push(arg);
+        self.key_ends.push(
+            u32::try_from(self.keys.len()).expect("too many keys in path"),
+        );
+    }
+
+    fn push_key(&mut self, key: KeyObject) {
+        self.keys.push(key);
+        match self.kinds.last() {
+            Some(OpKind::Keys) => *self.key_ends.last_mut().unwrap() += 1,
+            _ => self.push(OpKind::Keys, 0),
+        }
+    }
+
+    fn push_variable(&mut self, kind: OpKind, name: &str) {
+        self.push(kind, self.names.len());
+        self.names.push(Box::from(name));
+    }
+}
+
+/// The kind of an op, as a dense one-byte code
+///
+/// The codes are consecutive from zero, so matching on a kind compiles to
+/// a jump table, and per-kind facts can be read from tables indexed by it.
+#[derive(Clone, Copy, PartialEq, Eq)]
+#[repr(u8)]
+enum OpKind {
+    Keys = 0,
+    Index = 1,
+    KeyVariable = 2,
+    IndexVariable = 3,
+}
+
+/// A single instruction of a program, borrowed from its arrays
+///
+/// Consecutive static keys are fused into one `Keys` op, so `$a.b.c` runs
+/// as one op of three dict lookups.
+#[derive(Clone, Copy)]
+pub enum Op<'a> {
+    Keys(&'a [KeyObject]),
+    Index(usize),
+    /// A key variable, by slot
+    KeyVariable(usize),
+    /// An index variable, by slot
+    IndexVariable(usize),
+}
+
+/// The kind of container an op is applied to
+#[derive(Clone, Copy)]
+pub enum Container {
+    Dict,
+    List,
+}
+
+/// The container each kind of op is applied to, by code
+const CONTAINERS: [Container; 4] = [
+    Container::Dict,
+    Container::List,
+    Container::Dict,
+    Container::List,
+];
+
+impl OpKind {
+    fn container(self) -> Container {
+        CONTAINERS[self as usize]
+    }
+}
+
+/// The value of a variable, ready to be used as a key or index
+pub enum Resolved {
+    Key(KeyObject),
+    Index(usize),
+}
+
+impl Program {
+    pub fn new(py: Python<'_>, path: &Structpath) -> Self {
+        let mut builder = Builder::default();
+
+        for segment in path.iter_segments() {
+            match segment {
+                SegmentRef::Key(key) => {
+                    builder.push_key(KeyObject::new(py, &key))
+                }
+                SegmentRef::Index(idx) => builder.push(OpKind::Index, idx),
+                SegmentRef::KeyVariable(name) => {
+                    builder.push_variable(OpKind::KeyVariable, name)
+                }
+                SegmentRef::IndexVariable(name) => {
+                    builder.push_variable(OpKind::IndexVariable, name)
+                }
+            }
+        }
+
+        let py_names = builder
+            .names
+            .iter()
+            .map(|name| PyString::new(py, name).into())
+            .collect();
+
+        Program {
+            kinds: builder.kinds.into_boxed_slice(),
+            args: builder.args.into_boxed_slice(),
+            key_ends: builder.key_ends.into_boxed_slice(),
+            keys: builder.keys.into_boxed_slice(),
+            names: builder.names.into_boxed_slice(),
+            py_names,
+        }
+    }
+
+    /// The number of ops
+    fn len(&self) -> usize {
+        self.kinds.len()
+    }
+
+    /// The op at `pc`, or `None` past the end of the program
+    pub fn op(&self, pc: usize) -> Option<Op<'_>> {
+        let arg = *self.args.get(pc)?;
+        Some(match self.kinds[pc] {
+            OpKind::Keys => {
+                let start = pc.checked_sub(1).map_or(0, |i| self.key_ends[i]);
+                Op::Keys(&self.keys[start as usize..self.key_ends[pc] as usize])
+            }
+            OpKind::Index => Op::Index(arg),
+            OpKind::KeyVariable => Op::KeyVariable(arg),
+            OpKind::IndexVariable => Op::IndexVariable(arg),
+        })
+    }
+
+    pub fn ops(&self) -> impl Iterator<Item = Op<'_>> {
+        (0..self.len()).filter_map(|pc| self.op(pc))
+    }
+
+    /// The kind of container the op at `pc` is applied to
+    pub fn container(&self, pc: usize) -> Option<Container> {
+        self.kinds.get(pc).map(|kind| kind.container())
+    }
+
+    pub fn has_variables(&self) -> bool {
+        !self.names.is_empty()
+    }
+
+    /// Variable names as Python strings, by slot
+    pub fn variable_names(&self) -> &[Py<PyString>] {
+        &self.py_names
+    }
+
+    /// Look up every variable in `vars` up front, by slot
+    ///
+    /// Each variable is fetched from the dict once, with its prebuilt name,
+    /// and index variables are converted to indexes right away, so a
+    /// missing or invalid variable is reported from here before any data
+    /// has been read or changed.
+    pub fn resolve(
+        &self,
+        py: Python<'_>,
+        vars: Option<&PyDict>,
+    ) -> PyResult<Vec<Resolved>> {
+        if !self.has_variables() {
+            return Ok(Vec::new());
+        }
+        let Some(vars) = vars else {
+            return Err(crate::py_error(missing_context()));
+        };
+
+        let mut resolved = Vec::with_capacity(self.names.len());
+        for op in self.ops() {
+            let slot = match op {
+                Op::KeyVariable(slot) | Op::IndexVariable(slot) => slot,
+                Op::Keys(_) | Op::Index(_) => continue,
+            };
+            let value = vars
+                .get_item(&self.py_names[slot])
+                .ok_or_else(|| {
+                    crate::py_error(StructpathError::MissingVariable(
+                        self.names[slot].to_string(),
+                    ))
+                })?
+                .downcast::<PyString>()?;
+
+            resolved.push(match op {
+                Op::IndexVariable(_) => {
+                    let text = value.to_str()?;
+                    let idx = text.parse::<usize>().map_err(|_| {
+                        crate::py_error(StructpathError::InvalidVariableValue(
+                            text.to_string(),
+                        ))
+                    })?;
+                    Resolved::Index(idx)
+                }
+                _ => Resolved::Key(KeyObject::from_value(py, value)?),
+            });
+        }
+        Ok(resolved)
+    }
+}
+
+pub fn missing_context() -> StructpathError {
+    StructpathError::ParseError(
+        "Path contains variables, but no variable context was provided."
+            .to_string(),
+    )
+}
+
+/// The Python objects a key segment is looked up with
+///
+/// The key objects are created once, with the program, and reused by every
+/// traversal. A string computes its hash on first use and caches it, so
+/// repeated lookups neither allocate key objects nor hash them again.
+///
+/// Keys are deliberately not interned: they often come from data, and
+/// interned strings are immortal on recent CPython versions.
+#[derive(Clone)]
+pub struct KeyObject {
+    text: Py<PyString>,
+    /// The `int` form of integer-like keys
+    int: Option<PyObject>,
+}
+
+impl KeyObject {
+    fn new(py: Python<'_>, key: &SegmentKeyRef) -> Self {
+        let text = match *key {
+            SegmentKeyRef::String(s) => PyString::new(py, s),
+            SegmentKeyRef::Int(i) => PyString::new(py, &i.to_string()),
+        };
+        KeyObject {
+            text: text.into(),
+            int: int_form(key).map(|i| i.into_py(py)),
+        }
+    }
+
+    /// Key objects for a variable's value, used as given
+    fn from_value(py: Python<'_>, key: &PyString) -> PyResult<Self> {
+        let int = int_form(&SegmentKeyRef::String(key.to_str()?));
+        Ok(KeyObject {
+            text: key.into(),
+            int: int.map(|i| i.into_py(py)),
+        })
+    }
+
+    /// Look the key up, by its string form first and then its `int` form
+    pub fn lookup<'py>(&self, dict: &'py PyDict) -> Option<&'py PyAny> {
+        dict.get_item(&self.text)
+            .or_else(|| self.int.as_ref().and_then(|i| dict.get_item(i)))
+    }
+
+    /// The key to store this segment's entry under, with its current value
+    ///
+    /// An existing entry under the `int` form is updated in place; new
+    /// entries always get the string key.
+    pub fn entry<'py>(
+        &self,
+        py: Python<'py>,
+        dict: &'py PyDict,
+    ) -> (PyObject, Option<&'py PyAny>) {
+        if let Some(value) = dict.get_item(&self.text) {
+            return (self.text.clone_ref(py).into(), Some(value));
+        }
+        if let Some(int) = &self.int {
+            if let Some(value) = dict.get_item(int) {
+                return (int.clone_ref(py), Some(value));
+            }
+        }
+        (self.text.clone_ref(py).into(), None)
+    }
+}
+
+/// The integer a key stands for, if it is written as one
+///
+/// Only the canonical spelling counts, so `"12"` does but `"012"`, `"+12"`
+/// and `"-0"` do not.
+pub fn int_form(key: &SegmentKeyRef) -> Option<i64> {
+    match *key {
+        SegmentKeyRef::String(s) => {
+            let digits = s.strip_prefix('-').unwrap_or(s);
+            let canonical = if digits.starts_with('0') {
+                s == "0"
+            } else {
+                digits.starts_with(|c: char| c.is_ascii_digit())
+            };
+            // Checked first, as most keys are names and need no parsing
+            if canonical {
+                s.parse::<i64>().ok()
+            } else {
+                None
+            }
+        }
+        SegmentKeyRef::Int(i) => Some(i),
+    }
+}
@@ -0,0 +1,783 @@
+//! Traversal of Python containers in place
+//!
+//! The functions in this module run a compiled `Program` against `dict` and
+//! `list` objects directly, instead of converting the whole document to a
+//! `serde_json::Value` first. Only the containers along the path are touched.
+
+use crate::format;
+use crate::program::{int_form, Container, KeyObject, Op, Program, Resolved};
+use crate::types::{SegmentKeyRef, SegmentRef, Structpath, StructpathError};
+use pyo3::exceptions::PyTypeError;
+use pyo3::prelude::*;
+use pyo3::types::{PyDict, PyList, PyString, PyTuple};
+use pyo3::{PyTraverseError, PyVisit};
+use std::cell::RefCell;
+use std::mem;
+use std::sync::Arc;
+
+/// Read the value at the path of `program` in `data`
+///
+/// `resolved` holds the values of the path's variables, from
+/// `Program::resolve`.
+pub fn get<'py>(
+    program: &Program,
+    resolved: &[Resolved],
+    data: &'py PyAny,
+) -> Result<&'py PyAny, StructpathError> {
+    let mut current = data;
+
+    for op in program.ops() {
+        current = match op {
+            Op::Keys(run) => {
+                for key_obj in run {
+                    current = key_obj
+                        .lookup(as_dict(current)?)
+                        .ok_or(StructpathError::NotFound)?;
+                }
+                current
+            }
+            Op::Index(idx) => get_by_index(current, idx)?,
+            Op::KeyVariable(slot) | Op::IndexVariable(slot) => {
+                match &resolved[slot] {
+                    Resolved::Key(key_obj) => key_obj
+                        .lookup(as_dict(current)?)
+                        .ok_or(StructpathError::NotFound)?,
+                    Resolved::Index(idx) => get_by_index(current, *idx)?,
+                }
+            }
+        };
+    }
+
+    Ok(current)
+}
+
+/// A pending step of the variable search
+struct IterItem<'py> {
+    value: &'py PyAny,
+    pc: usize,
+    binding: Option<(usize, PyObject)>,
+}
+
+/// Find every resolution of the path's variables in `data`
+///
+/// Returns `(variables, value)` tuples in document order. The search runs
+/// depth-first on an explicit stack and keeps a single slot per variable,
+/// which each step overwrites with the value it binds; the dict of
+/// variables is only materialized once a full match is reached.
+///
+/// Without `with_vars`, only the matched values are returned and no
+/// variable bindings are recorded at all.
+pub fn iter(
+    py: Python<'_>,
+    program: &Program,
+    data: &PyAny,
+    with_vars: bool,
+) -> PyResult<Vec<PyObject>> {
+    let var_names = program.variable_names();
+    let mut bindings: Vec<PyObject> = vec![py.None(); var_names.len()];
+    let mut results = Vec::new();
+    let mut stack = vec![IterItem {
+        value: data,
+        pc: 0,
+        binding: None,
+    }];
+
+    while let Some(item) = stack.pop() {
+        if let Some((slot, value)) = item.binding {
+            bindings[slot] = value;
+        }
+
+        let Some(op) = program.op(item.pc) else {
+            if !with_vars {
+                results.push(item.value.into_py(py));
+                continue;
+            }
+            let vars = PyDict::new(py);
+            for (name, value) in var_names.iter().zip(&bindings) {
+                vars.set_item(name, value)?;
+            }
+            let result = PyTuple::new(py, [vars.as_ref(), item.value]);
+            results.push(result.into_py(py));
+            continue;
+        };
+
+        let pc = item.pc + 1;
+
+        // Misses are common here, so probe without building errors
+        match op {
+            Op::Keys(run) => {
+                let mut value = Some(item.value);
+                for key_obj in run {
+                    value = value
+                        .and_then(|value| value.downcast::<PyDict>().ok())
+                        .and_then(|dict| key_obj.lookup(dict));
+                }
+                if let Some(value) = value {
+                    stack.push(IterItem {
+                        value,
+                        pc,
+                        binding: None,
+                    });
+                }
+            }
+            Op::Index(idx) => {
+                let value = item
+                    .value
+                    .downcast::<PyList>()
+                    .ok()
+                    .and_then(|list| lookup_index(list, idx));
+                if let Some(value) = value {
+                    stack.push(IterItem {
+                        value,
+                        pc,
+                        binding: None,
+                    });
+                }
+            }
+            Op::KeyVariable(slot) => {
+                if let Ok(dict) = item.value.downcast::<PyDict>() {
+                    let start = stack.len();
+                    for (key, value) in dict.iter() {
+                        let binding = if !with_vars {
+                            None
+                        } else {
+                            Some((slot, binding_key(py, key)?))
+                        };
+                        stack.push(IterItem { value, pc, binding });
+                    }
+                    // Pop in dict order
+                    stack[start..].reverse();
+                }
+            }
+            Op::IndexVariable(slot) => {
+                if let Ok(list) = item.value.downcast::<PyList>() {
+                    for idx in (0..list.len()).rev() {
+                        stack.push(IterItem {
+                            value: list.get_item(idx)?,
+                            pc,
+                            binding: with_vars.then(|| (slot, idx.into_py(py))),
+                        });
+                    }
+                }
+            }
+        }
+    }
+
+    Ok(results)
+}
+
+/// Write `value` at the path of `program` into `data`
+///
+/// `resolved` holds the values of the path's variables, from
+/// `Program::resolve`. Containers along the path are modified in place.
+/// Missing or mismatched intermediate values are replaced by a new `dict`
+/// or `list`, depending on the segment that follows, and lists are padded
+/// with `None` up to the index written. Returns the root, which is `data`
+/// itself unless `data` is absent or of the wrong container type for the
+/// first segment.
+///
+/// Writing to the root path replaces the root with `value`; if both are
+/// dicts, `data` is updated in place to hold the items of `value`.
+pub fn write<'py>(
+    py: Python<'py>,
+    program: &Program,
+    resolved: &[Resolved],
+    data: Option<&'py PyAny>,
+    value: &'py PyAny,
+) -> PyResult<PyObject> {
+    let Some(first) = program.container(0) else {
+        let data = data.and_then(|data| data.downcast::<PyDict>().ok());
+        if let (Some(data), Ok(new)) = (data, value.downcast::<PyDict>()) {
+            if !data.is(new) {
+                data.clear();
+                for (key, item) in new.iter() {
+                    data.set_item(key, item)?;
+                }
+            }
+            return Ok(data.into_py(py));
+        }
+        return Ok(value.into_py(py));
+    };
+
+    let root = match data {
+        Some(data) if fits(data, first) => data,
+        _ => new_container(py, first),
+    };
+
+    let mut current = root;
+    for (i, op) in program.ops().enumerate() {
+        let next = program.container(i + 1);
+        current = match op {
+            Op::Keys(run) => {
+                let (last, inner) = run.split_last().expect("non-empty run");
+                for key_obj in inner {
+                    current = key_child(py, current, key_obj, Container::Dict)?;
+                }
+                key_step(py, current, last, next, value)?
+            }
+            Op::Index(idx) => index_step(py, current, idx, next, value)?,
+            Op::KeyVariable(slot) | Op::IndexVariable(slot) => {
+                match &resolved[slot] {
+                    Resolved::Key(key_obj) => {
+                        key_step(py, current, key_obj, next, value)?
+                    }
+                    Resolved::Index(idx) => {
+                        index_step(py, current, *idx, next, value)?
+                    }
+                }
+            }
+        };
+    }
+
+    Ok(root.into_py(py))
+}
+
+/// Whether `data` is the kind of container `container` names
+fn fits(data: &PyAny, container: Container) -> bool {
+    match container {
+        Container::Dict => data.downcast::<PyDict>().is_ok(),
+        Container::List => data.downcast::<PyList>().is_ok(),
+    }
+}
+
+fn new_container(py: Python<'_>, container: Container) -> &PyAny {
+    match container {
+        Container::Dict => PyDict::new(py).as_ref(),
+        Container::List => PyList::empty(py).as_ref(),
+    }
+}
+
+/// Descend into `key_obj`, or store `value` there if it is the last step
+fn key_step<'py>(
+    py: Python<'py>,
+    container: &'py PyAny,
+    key_obj: &KeyObject,
+    next: Option<Container>,
+    value: &'py PyAny,
+) -> PyResult<&'py PyAny> {
+    match next {
+        Some(next) => key_child(py, container, key_obj, next),
+        None => {
+            let dict = container.downcast::<PyDict>()?;
+            let (key, _) = key_obj.entry(py, dict);
+            dict.set_item(key, value)?;
+            Ok(container)
+        }
+    }
+}
+
+/// The container at `key_obj`, replaced by one fit for `next` if needed
+fn key_child<'py>(
+    py: Python<'py>,
+    container: &'py PyAny,
+    key_obj: &KeyObject,
+    next: Container,
+) -> PyResult<&'py PyAny> {
+    let dict = container.downcast::<PyDict>()?;
+    let (key, existing) = key_obj.entry(py, dict);
+    match existing {
+        Some(existing) if fits(existing, next) => Ok(existing),
+        _ => {
+            let new = new_container(py, next);
+            dict.set_item(key, new)?;
+            Ok(new)
+        }
+    }
+}
+
+/// Like `key_step`, for a list index
+fn index_step<'py>(
+    py: Python<'py>,
+    container: &'py PyAny,
+    idx: usize,
+    next: Option<Container>,
+    value: &'py PyAny,
+) -> PyResult<&'py PyAny> {
+    let list = padded_list(py, container, idx)?;
+    match next {
+        Some(next) => {
+            let existing = list.get_item(idx)?;
+            if fits(existing, next) {
+                Ok(existing)
+            } else {
+                let new = new_container(py, next);
+                list.set_item(idx, new)?;
+                Ok(new)
+            }
+        }
+        None => {
+            list.set_item(idx, value)?;
+            Ok(container)
+        }
+    }
+}
+
+/// `container` as a list, padded with `None` so that `idx` is in range
+fn padded_list<'py>(
+    py: Python<'py>,
+    container: &'py PyAny,
+    idx: usize,
+) -> PyResult<&'py PyList> {
+    let list = container.downcast::<PyList>()?;
+    let len = list.len();
+    if len <= idx {
+        // Assign one block of None to the end, so the list is resized once.
+        // Like `append`, this works on the list itself, so it does not go
+        // through methods overridden by list subclasses.
+        let padding = PyList::new(py, (len..=idx).map(|_| py.None()));
+        list.set_slice(len, len, padding)?;
+    }
+    Ok(list)
+}
+
+/// The segment leading from a parent value to a child
+enum WalkStep {
+    Root,
+    Key(PyObject),
+    Index(usize),
+}
+
+/// A pending value of a walk
+struct WalkerItem {
+    value: PyObject,
+    depth: usize,
+    step: WalkStep,
+    processed: bool,
+}
+
+/// A lazy depth-first walk over Python containers
+///
+/// Works like `walk::Walker`, directly on `dict` and `list` objects: values
+/// are produced one at a time, children before their parent, and one shared
+/// path is truncated and extended as items are popped. A container's
+/// children are only put on the stack once the walk reaches it.
+///
+/// The string form of the path is maintained the same way, so each value's
+/// path string costs one appended segment rather than a full formatting.
+/// Paths handed out by `node` are chains of `PathNode`s, built on request
+/// and shared by every path below them, so they cost one node each rather
+/// than a copy of the whole path.
+///
+/// See `WalkOptions` for the variations on this.
+pub struct Walker {
+    stack: Vec<WalkerItem>,
+    options: WalkOptions,
+    path: Structpath,
+    /// Nodes for the leading segments of `path`, as far as built
+    nodes: Vec<Arc<PathNode>>,
+    text: String,
+    /// Length of `text`, and whether a key has been written, per depth
+    marks: Vec<(usize, bool)>,
+    /// The raw keys and indexes leading to the current value, when walking
+    /// with `segments`
+    keys: Vec<PyObject>,
+}
+
+/// How a `Walker` walks
+#[derive(Default)]
+pub struct WalkOptions {
+    /// Descend into containers, but do not produce them, nor put them back
+    /// on the stack to be revisited
+    pub leaves_only: bool,
+    /// Only record the keys and indexes leading to each value, as found in
+    /// the data, instead of building its path and path string
+    pub segments: bool,
+    /// Called with the key or index of each child before the walk goes
+    /// there; children it rejects are skipped with everything below them
+    pub key_pred: Option<PyObject>,
+    /// The depth below which containers are not descended into, the root
+    /// being at depth 0
+    pub max_depth: Option<usize>,
+}
+
+/// A walked path, as its last segment and a link to its parent's path
+///
+/// Turned into a `Structpath` only when something besides its string form
+/// is needed.
+pub struct PathNode {
+    parent: Option<Arc<PathNode>>,
+    segment: PathSegment,
+}
+
+enum PathSegment {
+    Key(Box<str>),
+    IntKey(i64),
+    Index(usize),
+}
+
+impl PathNode {
+    pub fn to_path(&self) -> Structpath {
+        let mut chain = Vec::new();
+        let mut node = Some(self);
+        while let Some(current) = node {
+            chain.push(&current.segment);
+            node = current.parent.as_deref();
+        }
+
+        let mut path = Structpath::new();
+        for segment in chain.into_iter().rev() {
+            match segment {
+                PathSegment::Key(key) => path.push_string_key(key),
+                PathSegment::IntKey(key) => path.push_int_key(*key),
+                PathSegment::Index(idx) => path.push_index(*idx),
+            }
+        }
+        path
+    }
+}
+
+impl Drop for PathNode {
+    /// Unlink the chain one node at a time, so that dropping the last path
+    /// of a deep walk does not recurse once per level
+    fn drop(&mut self) {
+        let mut parent = self.parent.take();
+        while let Some(node) = parent {
+            parent = match Arc::try_unwrap(node) {
+                Ok(mut node) => node.parent.take(),
+                Err(_) => None,
+            };
+        }
+    }
+}
+
+/// Most stacks kept for reuse per thread
+const POOLED_STACKS: usize = 4;
+
+/// Largest stack, in items, worth keeping for reuse
+const POOLED_STACK_CAPACITY: usize = 1 << 16;
+
+thread_local! {
+    /// Empty stacks of finished walks, for the next walks on this thread
+    ///
+    /// Repeated walks then reuse the memory their predecessors already grew
+    /// instead of growing a new stack from scratch. Several are kept so that
+    /// walks running side by side each get one.
+    static STACKS: RefCell<Vec<Vec<WalkerItem>>> = RefCell::new(Vec::new());
+}
+
+impl Walker {
+    pub fn new(data: &PyAny, options: WalkOptions) -> Self {
+        let mut stack = STACKS
+            .try_with(|stacks| stacks.borrow_mut().pop())
+            .ok()
+            .flatten()
+            .unwrap_or_default();
+        stack.push(WalkerItem {
+            value: data.into(),
+            depth: 0,
+            step: WalkStep::Root,
+            processed: false,
+        });
+
+        Walker {
+            stack,
+            options,
+            path: Structpath::new(),
+            nodes: Vec::new(),
+            text: String::from("$"),
+            marks: vec![(1, true)],
+            keys: Vec::new(),
+        }
+    }
+
+    pub fn options(&self) -> &WalkOptions {
+        &self.options
+    }
+
+    /// The keys and indexes leading to the value last returned by
+    /// `advance`, when walking with `segments`
+    pub fn segments<'py>(&self, py: Python<'py>) -> &'py PyTuple {
+        PyTuple::new(py, &self.keys)
+    }
+
+    /// The path of the value last returned by `advance`, as a node
+    ///
+    /// `None` stands for the root path.
+    pub fn node(&mut self) -> Option<Arc<PathNode>> {
+        for i in self.nodes.len()..self.path.len() {
+            let segment = match self.path.segment(i) {
+                SegmentRef::Key(SegmentKeyRef::String(key)) => {
+                    PathSegment::Key(Box::from(key))
+                }
+                SegmentRef::Key(SegmentKeyRef::Int(key)) => {
+                    PathSegment::IntKey(key)
+                }
+                SegmentRef::Index(idx) => PathSegment::Index(idx),
+                SegmentRef::KeyVariable(_) | SegmentRef::IndexVariable(_) => {
+                    unreachable!("walked paths have no variables")
+                }
+            };
+            let parent = self.nodes.last().cloned();
+            self.nodes.push(Arc::new(PathNode { parent, segment }));
+        }
+        self.nodes.last().cloned()
+    }
+
+    /// The string form of the path of the value last returned by `advance`
+    pub fn text(&self) -> &str {
+        &self.text
+    }
+
+    /// Point the shared path at the given item
+    fn enter(
+        &mut self,
+        py: Python<'_>,
+        depth: usize,
+        step: &WalkStep,
+    ) -> PyResult<()> {
+        let parent = depth.saturating_sub(1);
+        if self.options.segments {
+            self.keys.truncate(parent);
+            match step {
+                WalkStep::Root => {}
+                WalkStep::Key(key) => self.keys.push(key.clone_ref(py)),
+                WalkStep::Index(idx) => self.keys.push(idx.into_py(py)),
+            }
+            return Ok(());
+        }
+
+        self.path.truncate(parent);
+        self.nodes.truncate(parent);
+        self.marks.truncate(parent + 1);
+        let (end, mut first) = self.marks[parent];
+        self.text.truncate(end);
+
+        match step {
+            WalkStep::Root => return Ok(()),
+            WalkStep::Key(key) => {
+                push_walked_key(&mut self.path, key.as_ref(py))?
+            }
+            WalkStep::Index(idx) => self.path.push_index(*idx),
+        }
+
+        let segment = self.path.segment(parent);
+        format::write_segment(&mut self.text, segment, &mut first)
+            .expect("writing to a String cannot fail");
+        self.marks.push((self.text.len(), first));
+        Ok(())
+    }
+
+    /// Whether the walk should go into the child under `key`
+    fn admits(&self, py: Python<'_>, key: impl ToPyObject) -> PyResult<bool> {
+        match &self.options.key_pred {
+            Some(pred) => pred.call1(py, (key.to_object(py),))?.is_true(py),
+            None => Ok(true),
+        }
+    }
+
+    /// Move to the next value, leaving its path in `self.text()` and
+    /// `self.node()`, or in `self.segments()`
+    pub fn advance(&mut self, py: Python<'_>) -> PyResult<Option<PyObject>> {
+        while let Some(mut item) = self.stack.pop() {
+            self.enter(py, item.depth, &item.step)?;
+
+            if item.processed {
+                return Ok(Some(item.value));
+            }
+
+            let depth = item.depth + 1;
+            let value = item.value.clone_ref(py).into_ref(py);
+            let too_deep =
+                self.options.max_depth.is_some_and(|max| depth > max);
+            let node = if too_deep { Node::Leaf } else { node(value) };
+            match node {
+                Node::Dict(dict) => {
+                    // Revisit this node once all of its children are done
+                    if !self.options.leaves_only {
+                        item.processed = true;
+                        self.stack.push(item);
+                    }
+
+                    // Snapshot the items first: the key predicate is Python
+                    // code, and may change the dict while it is checked
+                    let items: Vec<(&PyAny, &PyAny)> = dict.iter().collect();
+                    let start = self.stack.len();
+                    for (key, child) in items {
+                        if !self.admits(py, key)? {
+                            continue;
+                        }
+                        self.stack.push(WalkerItem {
+                            value: child.into(),
+                            depth,
+                            step: WalkStep::Key(key.into()),
+                            processed: false,
+                        });
+                    }
+                    // Pop in dict order
+                    self.stack[start..].reverse();
+                }
+                Node::List(list) => {
+                    if !self.options.leaves_only {
+                        item.processed = true;
+                        self.stack.push(item);
+                    }
+
+                    // As with dicts, take the items before the predicate
+                    // can change the list
+                    let items: Vec<&PyAny> = list.iter().collect();
+                    let start = self.stack.len();
+                    for (idx, child) in items.into_iter().enumerate() {
+                        if !self.admits(py, idx)? {
+                            continue;
+                        }
+                        self.stack.push(WalkerItem {
+                            value: child.into(),
+                            depth,
+                            step: WalkStep::Index(idx),
+                            processed: false,
+                        });
+                    }
+                    // Pop in list order
+                    self.stack[start..].reverse();
+                }
+                Node::Leaf => return Ok(Some(item.value)),
+            }
+        }
+        Ok(None)
+    }
+
+    /// Visit every Python object the walker holds, for the cycle collector
+    pub fn traverse(&self, visit: &PyVisit<'_>) -> Result<(), PyTraverseError> {
+        for item in &self.stack {
+            visit.call(&item.value)?;
+            if let WalkStep::Key(key) = &item.step {
+                visit.call(key)?;
+            }
+        }
+        if let Some(pred) = &self.options.key_pred {
+            visit.call(pred)?;
+        }
+        for key in &self.keys {
+            visit.call(key)?;
+        }
+        Ok(())
+    }
+
+    /// Drop every Python object the walker holds, ending the walk
+    pub fn clear(&mut self) {
+        self.stack.clear();
+        self.options.key_pred = None;
+        self.keys.clear();
+    }
+}
+
+/// What a walked value is, as far as the walk is concerned
+enum Node<'py> {
+    Dict(&'py PyDict),
+    List(&'py PyList),
+    Leaf,
+}
+
+/// Classify `value`, checking for plain `dict` and `list` first
+///
+/// Nearly every value in a document is either a leaf or an instance of the
+/// built-in types themselves, which an exact type check settles with one
+/// pointer comparison; subclasses are only looked for after that.
+fn node(value: &PyAny) -> Node<'_> {
+    if let Ok(dict) = value.downcast_exact::<PyDict>() {
+        Node::Dict(dict)
+    } else if let Ok(list) = value.downcast_exact::<PyList>() {
+        Node::List(list)
+    } else if let Ok(dict) = value.downcast::<PyDict>() {
+        Node::Dict(dict)
+    } else if let Ok(list) = value.downcast::<PyList>() {
+        Node::List(list)
+    } else {
+        Node::Leaf
+    }
+}
+
+impl Drop for Walker {
+    fn drop(&mut self) {
+        let mut stack = mem::take(&mut self.stack);
+        if stack.capacity() > POOLED_STACK_CAPACITY {
+            return;
+        }
+        stack.clear();
+        // The pool is gone if the thread is exiting; the stack is then freed
+        let _ = STACKS.try_with(|stacks| {
+            let mut stacks = stacks.borrow_mut();
+            if stacks.len() < POOLED_STACKS {
+                stacks.push(stack);
+            }
+        });
+    }
+}
+
+/// Append a dict key met during a walk to `path`
+///
+/// String keys spelled as canonical integers become int key segments, so
+/// that `{"1": ...}` and `{1: ...}` are both reported as `$1`; keys like
+/// `"007"` stay strings, as lookups do not treat them as integers either.
+fn push_walked_key(path: &mut Structpath, key: &PyAny) -> PyResult<()> {
+    if let Ok(key) = key.downcast::<PyString>() {
+        let key = key.to_str()?;
+        // The same spellings that lookups treat as integers, so that every
+        // walked path leads back to its value
+        match int_form(&SegmentKeyRef::String(key)) {
+            Some(int_key) => path.push_int_key(int_key),
+            None => path.push_string_key(key),
+        }
+    } else if let Ok(int_key) = key.extract::<i64>() {
+        path.push_int_key(int_key);
+    } else {
+        return Err(PyTypeError::new_err(
+            "Dictionary keys must be strings or integers",
+        ));
+    }
+    Ok(())
+}
+
+/// The value a key variable is bound to for a dict key
+///
+/// Keys are bound as strings, with integer keys (including `bool`) in
+/// their decimal form, which is also the form lookups match them by.
+fn binding_key(py: Python<'_>, key: &PyAny) -> PyResult<PyObject> {
+    if key.downcast::<PyString>().is_ok() {
+        Ok(key.into_py(py))
+    } else if let Ok(int_key) = key.extract::<i64>() {
+        Ok(int_key.to_string().into_py(py))
+    } else {
+        Err(PyTypeError::new_err(
+            "Dictionary keys must be strings or integers",
+        ))
+    }
+}
+
+fn as_dict(data: &PyAny) -> Result<&PyDict, StructpathError> {
+    data.downcast::<PyDict>()
+        .map_err(|_| invalid_path("object", data))
+}
+
+fn get_by_index(data: &PyAny, idx: usize) -> Result<&PyAny, StructpathError> {
+    let list = data
+        .downcast::<PyList>()
+        .map_err(|_| invalid_path("array", data))?;
+
+    lookup_index(list, idx).ok_or_else(|| {
+        StructpathError::IndexOutOfBounds(format!(
+            "Index {} out of bounds for array of length {}",
+            idx,
+            list.len()
+        ))
+    })
+}
+
+fn lookup_index(list: &PyList, idx: usize) -> Option<&PyAny> {
+    if idx < list.len() {
+        list.get_item(idx).ok()
+    } else {
+        None
+    }
+}
+
+fn invalid_path(expected: &str, found: &PyAny) -> StructpathError {
+    StructpathError::InvalidPath {
+        expected: expected.to_string(),
+        found: found
+            .get_type()
+            .name()
+            .map(|name| name.to_string())
+            .unwrap_or_else(|_| "unknown".to_string()),
+    }
+}
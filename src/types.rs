@@ -1,9 +1,11 @@
 use serde_json::Value;
+use smallvec::SmallVec;
 use std::collections::HashMap;
-use std::collections::HashSet;
 use std::fmt;
+use std::sync::OnceLock;
 use thiserror::Error;
 
+/// A single path segment
 #[derive(Debug, Clone, PartialEq)]
 pub enum Segment {
     Key(SegmentKey),
@@ -18,12 +20,116 @@ pub enum SegmentKey {
     Int(i64),
 }
 
-#[derive(Debug, Clone, PartialEq)]
+/// A borrowed view of a single path segment
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum SegmentRef<'a> {
+    Key(SegmentKeyRef<'a>),
+    Index(usize),
+    KeyVariable(&'a str),
+    IndexVariable(&'a str),
+}
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum SegmentKeyRef<'a> {
+    String(&'a str),
+    Int(i64),
+}
+
+impl SegmentRef<'_> {
+    /// An owned copy of this segment, independent of its path
+    pub fn into_owned(self) -> Segment {
+        match self {
+            SegmentRef::Key(key) => Segment::Key(key.into_owned()),
+            SegmentRef::Index(idx) => Segment::Index(idx),
+            SegmentRef::KeyVariable(name) => {
+                Segment::KeyVariable(name.to_string())
+            }
+            SegmentRef::IndexVariable(name) => {
+                Segment::IndexVariable(name.to_string())
+            }
+        }
+    }
+}
+
+impl SegmentKeyRef<'_> {
+    pub fn into_owned(self) -> SegmentKey {
+        match self {
+            SegmentKeyRef::String(key) => SegmentKey::String(key.to_string()),
+            SegmentKeyRef::Int(key) => SegmentKey::Int(key),
+        }
+    }
+}
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+enum Tag {
+    StringKey,
+    IntKey,
+    Index,
+    KeyVariable,
+    IndexVariable,
+}
+
+/// A path into a nested data structure
+///
+/// Segments are stored as parallel arrays rather than one heap object per
+/// segment: a tag per segment, the end offset of its text within a single
+/// shared string buffer, and an integer payload for indices and integer keys.
+/// Cloning a path therefore copies a handful of contiguous buffers
+/// regardless of how many string segments it holds.
+///
+/// The per-segment buffers keep up to `INLINE_SEGMENTS` entries inline and
+/// only move to the heap for longer paths, so typical paths allocate at most
+/// once, for their key text.
+///
+/// Owned segments are only built when `segments` is first called, and are
+/// dropped again whenever the path changes.
+#[derive(Debug, Clone)]
 pub struct Structpath {
-    segments: Vec<Segment>,
-    variable_names: HashSet<String>,
+    tags: SmallVec<[Tag; INLINE_SEGMENTS]>,
+    offsets: SmallVec<[u32; INLINE_SEGMENTS]>,
+    payloads: SmallVec<[u64; INLINE_SEGMENTS]>,
+    text: String,
+    owned: OnceLock<Box<[Segment]>>,
+}
+
+impl PartialEq for Structpath {
+    fn eq(&self, other: &Self) -> bool {
+        self.tags == other.tags
+            && self.offsets == other.offsets
+            && self.payloads == other.payloads
+            && self.text == other.text
+    }
+}
+
+const INLINE_SEGMENTS: usize = 8;
+
+/// An iterator over the segments of a path
+pub struct Segments<'a> {
+    path: &'a Structpath,
+    pos: usize,
 }
 
+impl<'a> Iterator for Segments<'a> {
+    type Item = SegmentRef<'a>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        if self.pos < self.path.len() {
+            let segment = self.path.segment(self.pos);
+            self.pos += 1;
+            Some(segment)
+        } else {
+            None
+        }
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        let remaining = self.path.len() - self.pos;
+        (remaining, Some(remaining))
+    }
+}
+
+impl ExactSizeIterator for Segments<'_> {}
+
 #[derive(Error, Debug)]
 pub enum StructpathError {
     #[error("Failed to parse path: {0}")]
@@ -42,35 +148,64 @@ pub enum StructpathError {
     InvalidVariableValue(String),
 }
 
+impl StructpathError {
+    /// An `InvalidPath` error naming the JSON type that was found
+    ///
+    /// Only the type is reported, since the mismatched value may be an
+    /// arbitrarily large sub-document.
+    pub(crate) fn invalid_path(expected: &str, found: &Value) -> Self {
+        let found = match found {
+            Value::Null => "null",
+            Value::Bool(_) => "boolean",
+            Value::Number(_) => "number",
+            Value::String(_) => "string",
+            Value::Array(_) => "array",
+            Value::Object(_) => "object",
+        };
+        StructpathError::InvalidPath {
+            expected: expected.to_string(),
+            found: found.to_string(),
+        }
+    }
+}
+
 impl Structpath {
     pub fn new() -> Self {
         Structpath {
-            segments: Vec::new(),
-            variable_names: HashSet::new(),
+            tags: SmallVec::new(),
+            offsets: SmallVec::new(),
+            payloads: SmallVec::new(),
+            text: String::new(),
+            owned: OnceLock::new(),
         }
     }
 
+    fn push(&mut self, tag: Tag, text: &str, payload: u64) {
+        self.owned.take();
+        self.text.push_str(text);
+        self.tags.push(tag);
+        self.offsets.push(self.text.len() as u32);
+        self.payloads.push(payload);
+    }
+
     pub fn push_string_key(&mut self, key: &str) {
-        self.segments
-            .push(Segment::Key(SegmentKey::String(key.to_string())));
+        self.push(Tag::StringKey, key, 0);
     }
 
     pub fn push_int_key(&mut self, key: i64) {
-        self.segments.push(Segment::Key(SegmentKey::Int(key)));
+        self.push(Tag::IntKey, "", key as u64);
     }
 
     pub fn push_index(&mut self, index: usize) {
-        self.segments.push(Segment::Index(index));
+        self.push(Tag::Index, "", index as u64);
     }
 
     pub fn push_key_variable(
         &mut self,
         name: &str,
     ) -> Result<(), StructpathError> {
-        if !self.variable_names.insert(name.to_string()) {
-            return Err(StructpathError::DuplicateVariable(name.to_string()));
-        }
-        self.segments.push(Segment::KeyVariable(name.to_string()));
+        self.check_variable_name(name)?;
+        self.push(Tag::KeyVariable, name, 0);
         Ok(())
     }
 
@@ -78,10 +213,40 @@ impl Structpath {
         &mut self,
         name: &str,
     ) -> Result<(), StructpathError> {
-        if !self.variable_names.insert(name.to_string()) {
+        self.check_variable_name(name)?;
+        self.push(Tag::IndexVariable, name, 0);
+        Ok(())
+    }
+
+    /// Shorten the path to its first `len` segments
+    ///
+    /// Has no effect if the path is already `len` segments long or shorter.
+    pub fn truncate(&mut self, len: usize) {
+        if len >= self.len() {
+            return;
+        }
+        let text_len = if len == 0 {
+            0
+        } else {
+            self.offsets[len - 1] as usize
+        };
+        self.owned.take();
+        self.tags.truncate(len);
+        self.offsets.truncate(len);
+        self.payloads.truncate(len);
+        self.text.truncate(text_len);
+    }
+
+    fn check_variable_name(&self, name: &str) -> Result<(), StructpathError> {
+        let duplicate = self.iter_segments().any(|segment| match segment {
+            SegmentRef::KeyVariable(var_name)
+            | SegmentRef::IndexVariable(var_name) => var_name == name,
+            _ => false,
+        });
+
+        if duplicate {
             return Err(StructpathError::DuplicateVariable(name.to_string()));
         }
-        self.segments.push(Segment::IndexVariable(name.to_string()));
         Ok(())
     }
 
@@ -89,6 +254,12 @@ impl Structpath {
         crate::parse::parse(path_str)
     }
 
+    /// Parse a path string, reusing the result of earlier calls with the
+    /// same input.
+    pub fn parse_cached(path_str: &str) -> Result<Self, StructpathError> {
+        crate::cache::parse_cached(path_str)
+    }
+
     pub fn get<'a>(
         &self,
         data: &'a Value,
@@ -106,18 +277,90 @@ impl Structpath {
         crate::write::write(self, data, value, vars)
     }
 
+    /// Number of segments in the path
+    pub fn len(&self) -> usize {
+        self.tags.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.tags.is_empty()
+    }
+
+    /// Total length of the key and variable name text
+    pub(crate) fn text_len(&self) -> usize {
+        self.text.len()
+    }
+
+    /// Whether the path contains key or index variables
+    pub fn has_variables(&self) -> bool {
+        self.tags
+            .iter()
+            .any(|tag| matches!(tag, Tag::KeyVariable | Tag::IndexVariable))
+    }
+
+    /// The segment at position `i`
+    ///
+    /// Panics if `i` is out of bounds.
+    pub fn segment(&self, i: usize) -> SegmentRef<'_> {
+        let start = if i == 0 {
+            0
+        } else {
+            self.offsets[i - 1] as usize
+        };
+        let text = &self.text[start..self.offsets[i] as usize];
+        let payload = self.payloads[i];
+
+        match self.tags[i] {
+            Tag::StringKey => SegmentRef::Key(SegmentKeyRef::String(text)),
+            Tag::IntKey => SegmentRef::Key(SegmentKeyRef::Int(payload as i64)),
+            Tag::Index => SegmentRef::Index(payload as usize),
+            Tag::KeyVariable => SegmentRef::KeyVariable(text),
+            Tag::IndexVariable => SegmentRef::IndexVariable(text),
+        }
+    }
+
+    /// Iterate over all resolutions of this path's variables in `data`
+    ///
+    /// Yields each matching value together with the variable values that
+    /// lead to it.
+    pub fn iter<'a>(
+        &'a self,
+        data: &'a Value,
+    ) -> impl Iterator<Item = (&'a Value, HashMap<String, Value>)> {
+        crate::iter::iter_variables(self, data)
+    }
+
     pub fn segments(&self) -> &[Segment] {
-        &self.segments
+        self.owned.get_or_init(|| {
+            self.iter_segments().map(SegmentRef::into_owned).collect()
+        })
+    }
+
+    /// Iterate over borrowed views of the segments, without building the
+    /// owned ones
+    pub fn iter_segments(&self) -> Segments<'_> {
+        Segments { path: self, pos: 0 }
     }
 
     pub fn walk(data: &Value) -> impl Iterator<Item = (Structpath, &Value)> {
         crate::walk::new_walker(data)
     }
+
+    /// Walk through all paths in `data`, calling `f` for each one
+    ///
+    /// Visits the same paths in the same order as [`Structpath::walk`], but
+    /// lends each path to the callback instead of handing out a copy.
+    pub fn walk_with<F>(data: &Value, f: F)
+    where
+        F: FnMut(&Structpath, &Value),
+    {
+        crate::walk::walk_with(data, f)
+    }
 }
 
 impl fmt::Display for Structpath {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        write!(f, "{}", crate::format::to_string(self))
+        crate::format::write_path(f, self)
     }
 }
 
@@ -126,3 +369,109 @@ impl Default for Structpath {
         Self::new()
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_segments() {
+        let mut path = Structpath::new();
+        path.push_string_key("users");
+        path.push_index(3);
+        path.push_int_key(-7);
+        path.push_key_variable("name").unwrap();
+        path.push_index_variable("idx").unwrap();
+        path.push_string_key("");
+
+        let segments: Vec<SegmentRef> = path.iter_segments().collect();
+        assert_eq!(
+            segments,
+            vec![
+                SegmentRef::Key(SegmentKeyRef::String("users")),
+                SegmentRef::Index(3),
+                SegmentRef::Key(SegmentKeyRef::Int(-7)),
+                SegmentRef::KeyVariable("name"),
+                SegmentRef::IndexVariable("idx"),
+                SegmentRef::Key(SegmentKeyRef::String("")),
+            ]
+        );
+        assert_eq!(path.len(), 6);
+        assert_eq!(path.iter_segments().len(), 6);
+    }
+
+    #[test]
+    fn test_owned_segments() {
+        let mut path = Structpath::parse("$users[3].#name[#idx].7").unwrap();
+        assert_eq!(
+            path.segments(),
+            &[
+                Segment::Key(SegmentKey::String("users".into())),
+                Segment::Index(3),
+                Segment::KeyVariable("name".into()),
+                Segment::IndexVariable("idx".into()),
+                Segment::Key(SegmentKey::Int(7)),
+            ]
+        );
+
+        path.truncate(1);
+        path.push_index(0);
+        assert_eq!(
+            path.segments(),
+            &[
+                Segment::Key(SegmentKey::String("users".into())),
+                Segment::Index(0),
+            ]
+        );
+        assert_eq!(path, Structpath::parse("$users[0]").unwrap());
+    }
+
+    #[test]
+    fn test_long_paths_spill_to_heap() {
+        let mut path = Structpath::new();
+        for i in 0..INLINE_SEGMENTS * 2 {
+            path.push_string_key(&format!("k{}", i));
+            path.push_index(i);
+        }
+        assert!(path.tags.spilled());
+
+        let segments: Vec<SegmentRef> = path.iter_segments().collect();
+        assert_eq!(segments.len(), INLINE_SEGMENTS * 4);
+        assert_eq!(segments[30], SegmentRef::Key(SegmentKeyRef::String("k15")));
+        assert_eq!(segments[31], SegmentRef::Index(15));
+
+        let short = Structpath::parse("$a.b[0].c").unwrap();
+        assert!(!short.tags.spilled());
+        assert!(!short.payloads.spilled());
+    }
+
+    #[test]
+    fn test_truncate() {
+        let mut path = Structpath::parse("$a[0].#var.b").unwrap();
+
+        path.truncate(2);
+        assert_eq!(format!("{}", path), "$a[0]");
+
+        path.push_key_variable("var").unwrap();
+        path.push_string_key("c");
+        assert_eq!(format!("{}", path), "$a[0].#var.c");
+
+        path.truncate(10);
+        assert_eq!(path.len(), 4);
+
+        path.truncate(0);
+        assert!(path.is_empty());
+        assert_eq!(path, Structpath::new());
+    }
+
+    #[test]
+    fn test_duplicate_variable() {
+        let mut path = Structpath::new();
+        path.push_key_variable("id").unwrap();
+        path.push_string_key("id");
+
+        let result = path.push_index_variable("id");
+        assert!(matches!(result, Err(StructpathError::DuplicateVariable(_))));
+        assert_eq!(path.len(), 2);
+    }
+}
@@ -1,105 +1,131 @@
 use crate::types::Structpath;
 use serde_json::Value;
-use std::collections::VecDeque;
 
 pub fn new_walker(data: &Value) -> impl Iterator<Item = (Structpath, &Value)> {
-    Walker::new(&Structpath::new(), data)
+    Walker::new(data)
+}
+
+pub fn walk_with<F>(data: &Value, mut f: F)
+where
+    F: FnMut(&Structpath, &Value),
+{
+    let mut walker = Walker::new(data);
+    while let Some(value) = walker.advance() {
+        f(&walker.path, value);
+    }
+}
+
+/// The segment leading from a parent value to a child
+#[derive(Clone, Copy)]
+enum Step<'a> {
+    Root,
+    Key(&'a str),
+    Index(usize),
 }
 
 /// A state item for the Walker's traversal stack
-#[derive(Clone)]
 struct WalkerItem<'a> {
-    path: Structpath,
     value: &'a Value,
+    depth: usize,
+    step: Step<'a>,
     processed: bool,
 }
 
 /// An iterator that walks through a JSON-like data structure depth-first
+///
+/// Children are visited before their parent. Rather than storing a full path
+/// per pending item, each item records its depth and the single segment that
+/// leads to it; one shared path is truncated and extended as items are
+/// popped, so pending items cost O(1) regardless of nesting depth.
 pub struct Walker<'a> {
-    stack: VecDeque<WalkerItem<'a>>,
+    stack: Vec<WalkerItem<'a>>,
+    path: Structpath,
 }
 
 impl<'a> Walker<'a> {
-    /// Create a new Walker to iterate over the data starting from the given path
-    pub fn new(_path: &Structpath, data: &'a Value) -> Self {
-        let mut stack = VecDeque::new();
-        stack.push_back(WalkerItem {
+    /// Create a new Walker to iterate over the data from its root
+    pub fn new(data: &'a Value) -> Self {
+        Walker {
+            stack: vec![WalkerItem {
+                value: data,
+                depth: 0,
+                step: Step::Root,
+                processed: false,
+            }],
             path: Structpath::new(),
-            value: data,
-            processed: false,
-        });
-        Walker { stack }
+        }
     }
-}
 
-impl<'a> Iterator for Walker<'a> {
-    type Item = (Structpath, &'a Value);
+    /// Point the shared path at the given item
+    fn enter(&mut self, depth: usize, step: Step<'a>) {
+        self.path.truncate(depth.saturating_sub(1));
+        match step {
+            Step::Root => {}
+            Step::Key(key) => {
+                if let Ok(int_key) = key.parse::<i64>() {
+                    self.path.push_int_key(int_key);
+                } else {
+                    self.path.push_string_key(key);
+                }
+            }
+            Step::Index(idx) => self.path.push_index(idx),
+        }
+    }
 
-    fn next(&mut self) -> Option<Self::Item> {
-        if let Some(mut item) = self.stack.pop_front() {
-            if !item.processed {
-                // Mark as processed and push back to the stack
-                item.processed = true;
-
-                // Process children before revisiting this node
-                match item.value {
-                    Value::Object(map) => {
-                        // Push the current item back to the stack to be returned later
-                        self.stack.push_front(item.clone());
-
-                        // Then push all children to be processed first (in reverse order)
-                        let mut entries: Vec<_> = map.iter().collect();
-                        // Reverse to maintain expected traversal order
-                        entries.reverse();
-
-                        for (key, value) in entries {
-                            let mut new_path = item.path.clone();
-                            if let Ok(int_key) = key.parse::<i64>() {
-                                new_path.push_int_key(int_key);
-                            } else {
-                                new_path.push_string_key(key);
-                            }
-
-                            self.stack.push_front(WalkerItem {
-                                path: new_path,
-                                value,
-                                processed: false,
-                            });
-                        }
-                    }
-                    Value::Array(arr) => {
-                        // Push the current item back to the stack to be returned later
-                        self.stack.push_front(item.clone());
-
-                        // Then push all array items to be processed first (in reverse order)
-                        for (idx, value) in arr.iter().enumerate().rev() {
-                            let mut new_path = item.path.clone();
-                            new_path.push_index(idx);
-
-                            self.stack.push_front(WalkerItem {
-                                path: new_path,
-                                value,
-                                processed: false,
-                            });
-                        }
+    /// Move to the next value, leaving its path in `self.path`
+    fn advance(&mut self) -> Option<&'a Value> {
+        while let Some(mut item) = self.stack.pop() {
+            self.enter(item.depth, item.step);
+
+            if item.processed {
+                return Some(item.value);
+            }
+
+            let depth = item.depth + 1;
+            match item.value {
+                Value::Object(map) => {
+                    // Revisit this node once all of its children are done
+                    item.processed = true;
+                    self.stack.push(item);
+
+                    // Push in reverse so children pop in their original order
+                    for (key, value) in map.iter().rev() {
+                        self.stack.push(WalkerItem {
+                            value,
+                            depth,
+                            step: Step::Key(key),
+                            processed: false,
+                        });
                     }
-                    _ => {
-                        // For scalar values, just return the item directly
-                        return Some((item.path, item.value));
+                }
+                Value::Array(arr) => {
+                    item.processed = true;
+                    self.stack.push(item);
+
+                    for (idx, value) in arr.iter().enumerate().rev() {
+                        self.stack.push(WalkerItem {
+                            value,
+                            depth,
+                            step: Step::Index(idx),
+                            processed: false,
+                        });
                     }
                 }
-
-                // Get the next item
-                return self.next();
-            } else {
-                // Item has been processed, return it
-                return Some((item.path, item.value));
+                _ => return Some(item.value),
             }
         }
         None
     }
 }
 
+impl<'a> Iterator for Walker<'a> {
+    type Item = (Structpath, &'a Value);
+
+    fn next(&mut self) -> Option<Self::Item> {
+        self.advance().map(|value| (self.path.clone(), value))
+    }
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -324,6 +350,29 @@ mod tests {
         assert!(a_idx < root_idx);
     }
 
+    #[test]
+    fn test_walk_with_matches_walker() {
+        let data = json!({
+            "a": [1, {"b": 2, "c": [3]}],
+            "d": {"e": null},
+            "f": []
+        });
+
+        let expected: Vec<(String, Value)> = new_walker(&data)
+            .map(|(path, value)| (format!("{}", path), value.clone()))
+            .collect();
+
+        let mut visited = Vec::new();
+        walk_with(&data, |path, value| {
+            visited.push((format!("{}", path), value.clone()));
+        });
+
+        assert_eq!(visited, expected);
+        assert_eq!(visited.len(), 10);
+        assert_eq!(visited[0], ("$a[0]".to_string(), json!(1)));
+        assert_eq!(visited.last().unwrap().0, "$");
+    }
+
     #[test]
     fn test_walker_with_complex_nested_structure() {
         let data = json!({
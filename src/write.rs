@@ -1,7 +1,13 @@
-use crate::types::{Segment, SegmentKey, Structpath, StructpathError};
+use crate::types::{SegmentKeyRef, SegmentRef, Structpath, StructpathError};
 use serde_json::{Map, Value};
 use std::collections::HashMap;
 
+/// A segment to write through, with any variable replaced by its value
+enum Step<'a> {
+    Key(SegmentKeyRef<'a>),
+    Index(usize),
+}
+
 pub fn write(
     path: &Structpath,
     data: Option<&mut Value>,
@@ -14,100 +20,48 @@ pub fn write(
     };
     let mut_ref = &mut root_value;
 
-    let has_variables = path.segments().iter().any(|segment| {
-        matches!(segment, Segment::KeyVariable(_) | Segment::IndexVariable(_))
-    });
-
-    if has_variables && vars.is_none() {
-        return Err(StructpathError::ParseError(
-            "Path contains variables, but no variable context was provided."
-                .to_string(),
-        ));
-    }
-
-    if path.segments().is_empty() {
+    if path.is_empty() {
         *mut_ref = value;
         return Ok(root_value);
     }
 
-    let segments = path.segments().to_vec();
-    let segments_len = segments.len();
-
-    let mut current = mut_ref;
-    for (i, segment) in segments.iter().enumerate() {
-        if i == segments_len - 1 {
-            match segment {
-                Segment::Key(key) => {
-                    write_by_key(current, key, value)?;
-                }
-                Segment::Index(idx) => {
-                    write_by_index(current, *idx, value)?;
+    // Paths without variables map straight to steps; variables are looked
+    // up here, once, so the loop below never deals with them
+    let steps = if path.has_variables() {
+        let vars = vars.ok_or_else(|| {
+            StructpathError::ParseError(
+                "Path contains variables, but no variable context was \
+                 provided."
+                    .to_string(),
+            )
+        })?;
+        path.iter_segments()
+            .map(|segment| resolve(segment, vars))
+            .collect::<Result<Vec<_>, _>>()?
+    } else {
+        path.iter_segments()
+            .map(|segment| match segment {
+                SegmentRef::Key(key) => Step::Key(key),
+                SegmentRef::Index(idx) => Step::Index(idx),
+                SegmentRef::KeyVariable(_) | SegmentRef::IndexVariable(_) => {
+                    unreachable!("path has no variables")
                 }
-                Segment::KeyVariable(var_name) => {
-                    let variables = vars.unwrap();
-                    let var_value =
-                        variables.get(var_name).ok_or_else(|| {
-                            StructpathError::MissingVariable(var_name.clone())
-                        })?;
-
-                    write_by_key(
-                        current,
-                        &SegmentKey::String(var_value.clone()),
-                        value,
-                    )?;
-                }
-                Segment::IndexVariable(var_name) => {
-                    let variables = vars.unwrap();
-                    let var_value =
-                        variables.get(var_name).ok_or_else(|| {
-                            StructpathError::MissingVariable(var_name.clone())
-                        })?;
-
-                    let idx = var_value.parse::<usize>().map_err(|_| {
-                        StructpathError::InvalidVariableValue(var_value.clone())
-                    })?;
-
-                    write_by_index(current, idx, value)?;
-                }
-            }
-            break;
-        }
-
-        match segment {
-            Segment::Key(key) => {
-                current =
-                    ensure_next_segment_exists(current, key, &segments[i + 1])?;
-            }
-            Segment::Index(idx) => {
-                current =
-                    ensure_array_index_exists(current, *idx, &segments[i + 1])?;
-            }
-            Segment::KeyVariable(var_name) => {
-                let variables = vars.unwrap();
-                let var_value = variables.get(var_name).ok_or_else(|| {
-                    StructpathError::MissingVariable(var_name.clone())
-                })?;
-
-                current = ensure_next_segment_exists(
-                    current,
-                    &SegmentKey::String(var_value.clone()),
-                    &segments[i + 1],
-                )?;
-            }
-            Segment::IndexVariable(var_name) => {
-                let variables = vars.unwrap();
-                let var_value = variables.get(var_name).ok_or_else(|| {
-                    StructpathError::MissingVariable(var_name.clone())
-                })?;
-
-                let idx = var_value.parse::<usize>().map_err(|_| {
-                    StructpathError::InvalidVariableValue(var_value.clone())
-                })?;
+            })
+            .collect()
+    };
 
-                current =
-                    ensure_array_index_exists(current, idx, &segments[i + 1])?;
-            }
-        }
+    let (last, inner) = steps.split_last().expect("path is not empty");
+    let mut current = mut_ref;
+    for (i, step) in inner.iter().enumerate() {
+        let next = &steps[i + 1];
+        current = match step {
+            Step::Key(key) => ensure_next_segment_exists(current, key, next)?,
+            Step::Index(idx) => ensure_array_index_exists(current, *idx)?,
+        };
+    }
+    match last {
+        Step::Key(key) => write_by_key(current, key, value)?,
+        Step::Index(idx) => write_by_index(current, *idx, value)?,
     }
 
     if let Some(original_data) = data {
@@ -117,102 +71,90 @@ pub fn write(
     Ok(root_value)
 }
 
+/// The step for `segment`, with the value of its variable if it has one
+fn resolve<'a>(
+    segment: SegmentRef<'a>,
+    vars: &'a HashMap<String, String>,
+) -> Result<Step<'a>, StructpathError> {
+    let var_value = |var_name: &str| {
+        vars.get(var_name).ok_or_else(|| {
+            StructpathError::MissingVariable(var_name.to_string())
+        })
+    };
+
+    Ok(match segment {
+        SegmentRef::Key(key) => Step::Key(key),
+        SegmentRef::Index(idx) => Step::Index(idx),
+        SegmentRef::KeyVariable(var_name) => {
+            Step::Key(SegmentKeyRef::String(var_value(var_name)?))
+        }
+        SegmentRef::IndexVariable(var_name) => {
+            let var_value = var_value(var_name)?;
+            let idx = var_value.parse::<usize>().map_err(|_| {
+                StructpathError::InvalidVariableValue(var_value.clone())
+            })?;
+            Step::Index(idx)
+        }
+    })
+}
+
 fn ensure_next_segment_exists<'a>(
     data: &'a mut Value,
-    key: &SegmentKey,
-    _next_segment: &Segment,
+    key: &SegmentKeyRef,
+    next_segment: &Step,
 ) -> Result<&'a mut Value, StructpathError> {
     let key_str = match key {
-        SegmentKey::String(s) => s.clone(),
-        SegmentKey::Int(i) => i.to_string(),
+        SegmentKeyRef::String(s) => s.to_string(),
+        SegmentKeyRef::Int(i) => i.to_string(),
     };
 
-    match data {
-        Value::Object(map) => {
-            // Create key if it doesn't exist
-            if !map.contains_key(&key_str) {
-                // Insert null instead of empty object/array
-                map.insert(key_str.clone(), Value::Null);
-            }
+    // Convert to an object if it's not one already
+    if !data.is_object() {
+        *data = Value::Object(Map::new());
+    }
+    let Value::Object(map) = data else {
+        unreachable!("replaced by an object above");
+    };
 
-            // Now get the value to return
-            let value = map.get_mut(&key_str).unwrap();
+    // A single lookup finds or creates the entry
+    let value = map.entry(key_str).or_insert(Value::Null);
 
-            // Based on the next segment, ensure the correct container type
-            match _next_segment {
-                Segment::Key(_) | Segment::KeyVariable(_) => {
-                    // Need an object for the next segment
-                    if !value.is_object() {
-                        *value = Value::Object(Map::new());
-                    }
-                }
-                Segment::Index(_) | Segment::IndexVariable(_) => {
-                    // Need an array for the next segment
-                    if !value.is_array() {
-                        *value = Value::Array(Vec::new());
-                    }
-                }
+    // Based on the next segment, ensure the correct container type
+    match next_segment {
+        Step::Key(_) => {
+            if !value.is_object() {
+                *value = Value::Object(Map::new());
             }
-
-            Ok(map.get_mut(&key_str).unwrap())
         }
-        _ => {
-            // Convert to an object if it's not one already
-            let mut map = Map::new();
-
-            // Create the appropriate container based on the next segment
-            match _next_segment {
-                Segment::Key(_) | Segment::KeyVariable(_) => {
-                    map.insert(key_str.clone(), Value::Object(Map::new()));
-                }
-                Segment::Index(_) | Segment::IndexVariable(_) => {
-                    map.insert(key_str.clone(), Value::Array(Vec::new()));
-                }
-            }
-
-            *data = Value::Object(map);
-
-            if let Value::Object(map) = data {
-                Ok(map.get_mut(&key_str).unwrap())
-            } else {
-                Err(StructpathError::InvalidPath {
-                    expected: "object".to_string(),
-                    found: format!("{:?}", data),
-                })
+        Step::Index(_) => {
+            if !value.is_array() {
+                *value = Value::Array(Vec::new());
             }
         }
     }
+
+    Ok(value)
 }
 
-fn ensure_array_index_exists<'a>(
-    data: &'a mut Value,
+fn ensure_array_index_exists(
+    data: &mut Value,
     idx: usize,
-    _next_segment: &Segment,
-) -> Result<&'a mut Value, StructpathError> {
+) -> Result<&mut Value, StructpathError> {
     match data {
         Value::Array(arr) => {
-            while arr.len() <= idx {
-                arr.push(Value::Null);
+            if arr.len() <= idx {
+                arr.resize(idx + 1, Value::Null);
             }
 
             Ok(&mut arr[idx])
         }
         _ => {
-            let mut new_arr = Vec::new();
-
-            for _ in 0..=idx {
-                new_arr.push(Value::Null);
-            }
-
-            *data = Value::Array(new_arr);
+            *data = Value::Array(vec![Value::Null; idx + 1]);
 
             if let Value::Array(arr) = data {
                 Ok(&mut arr[idx])
             } else {
-                Err(StructpathError::InvalidPath {
-                    expected: "array".to_string(),
-                    found: format!("{:?}", data),
-                })
+                Err(StructpathError::invalid_path("array", data))
             }
         }
     }
@@ -220,12 +162,12 @@ fn ensure_array_index_exists<'a>(
 
 fn write_by_key(
     data: &mut Value,
-    key: &SegmentKey,
+    key: &SegmentKeyRef,
     value: Value,
 ) -> Result<(), StructpathError> {
     let key_str = match key {
-        SegmentKey::String(s) => s.clone(),
-        SegmentKey::Int(i) => i.to_string(),
+        SegmentKeyRef::String(s) => s.to_string(),
+        SegmentKeyRef::Int(i) => i.to_string(),
     };
 
     match data {
@@ -249,18 +191,15 @@ fn write_by_index(
 ) -> Result<(), StructpathError> {
     match data {
         Value::Array(arr) => {
-            while arr.len() <= idx {
-                arr.push(Value::Null);
+            if arr.len() <= idx {
+                arr.resize(idx + 1, Value::Null);
             }
             arr[idx] = value;
             Ok(())
         }
         _ => {
-            let mut new_arr = Vec::new();
-
-            for _ in 0..idx {
-                new_arr.push(Value::Null);
-            }
+            let mut new_arr = Vec::with_capacity(idx + 1);
+            new_arr.resize(idx, Value::Null);
             new_arr.push(value);
 
             *data = Value::Array(new_arr);